@@ -0,0 +1,257 @@
+"""
+Benchmark suite
+Times the main routines on seeded synthetic workloads of growing size, instead of the 13 towns of
+locations.txt and the orders hard-coded in each module's __main__.
+
+    python benchmark.py                                 All benchmarks at every size, as JSON on stdout
+    python benchmark.py --quick                         Smallest size of each benchmark only
+    python benchmark.py --only determine_route matrix_matmul
+    python benchmark.py --output baseline.json          Write the JSON to a file instead
+    python benchmark.py --compare baseline.json         Also flag timings slower than the baseline by more
+                                                        than --threshold (exits with 1 if any are)
+
+Each timing is the best of --repeat runs, in seconds. Towns are generated in the locations.txt format
+on an M x M grid and loaded like the real file, so the whole pipeline is exercised.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from math import ceil
+
+import taxicab_distances
+from taxicab_distances import Network, generate_edges
+from location_cache import load_locations
+from supply import SupplyOrder, Supplies, SUPPLY_NAMES, SUPPLY_WEIGHT
+from constants import EMPTY_WEIGHT_1
+from matrix import Matrix, np
+from select_maximum_supplies import select_maximum_of_supplies
+import DEPRECATED_select_maximum_supplies
+from generate_trip import determine_route
+from plane_sequencer import determine_planes, plane_counts
+
+SEED = 2025
+REPEAT = 3
+THRESHOLD = 1.25            # Slower than the baseline by more than this factor is a regression
+NOISE_FLOOR = 0.001         # Seconds; differences below this are never flagged
+
+# Sizes of each benchmark, smallest first: towns, orders, capacity (kg), matrix edge or weights.
+SIZES: dict[str, list[int]] = {
+    "generate_edges": [50, 200, 800],
+    "determine_route": [10, 50, 200],
+    "select_maximum_of_supplies": [5, 10, 20],
+    "DEPRECATED_select_maximum_of_supplies": [5, 10, 20],
+    "matrix_matmul": [16, 64, 128],
+    "matrix_add": [16, 64, 256],
+    "matrix_str": [16, 64, 128],
+    "determine_planes": [1_000, 10_000, 100_000],
+    "plane_counts": [1_000, 100_000, 1_000_000],
+}
+
+def generate_towns(n: int, m: int = None, seed: int = SEED) -> str:
+    """
+    Returns n towns on an m x m grid (by default just large enough) in the locations.txt format.
+    The first town is Perth, the source of every route.
+    """
+
+    rng = random.Random(seed)
+    m = m or max(10, int(n ** 0.5) * 2)
+    lines = []
+    for i in range(n):
+        name = "Perth" if i == 0 else f"Town {i}"
+        lines.append(f"    {rng.randrange(m)}, {rng.randrange(m)} {name} {6000 + i}")
+    return "\n".join(lines) + "\n"
+
+def generate_orders(k: int, towns: list[str], max_count: int = 100, seed: int = SEED) -> list[SupplyOrder]:
+    """
+    Returns k orders for random towns (other than Perth), each of one to four random supplies.
+    """
+
+    rng = random.Random(seed)
+    towns = [town for town in towns if town != "Perth"]
+    supplies = list(SUPPLY_NAMES)
+    orders = []
+    for _ in range(k):
+        counts = {supply: rng.randint(1, max_count) for supply in rng.sample(supplies, rng.randint(1, 4))}
+        orders.append(SupplyOrder(town = rng.choice(towns), supplies = Supplies(**counts)))
+    return orders
+
+@contextlib.contextmanager
+def synthetic_network(n: int, seed: int = SEED):
+    """
+    Writes n generated towns to a temporary location file and makes its Network the default one
+    (as returned by get_network()) for the duration. Yields the file's path.
+    """
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "towns.txt")
+        with open(path, "w") as f:
+            f.write(generate_towns(n, seed = seed))
+
+        networks = taxicab_distances._networks
+        previous = networks.get("locations.txt")
+        networks["locations.txt"] = Network(*load_locations(path))
+        try:
+            yield path
+        finally:
+            networks.pop(path, None)
+            if previous is None:
+                networks.pop("locations.txt", None)
+            else:
+                networks["locations.txt"] = previous
+
+def best_time(run, setup = None, repeat: int = REPEAT) -> float:
+    """
+    Returns the least time of repeat calls of run(setup()), excluding the time spent in setup.
+    """
+
+    best = float("inf")
+    for _ in range(repeat):
+        argument = setup() if setup else None
+        start = time.perf_counter()
+        run(argument) if setup else run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+# One function per benchmark: bench(size, repeat) -> seconds
+
+def bench_generate_edges(size: int, repeat: int) -> float:
+    with synthetic_network(size) as path:
+        def run():
+            taxicab_distances._networks.pop(path, None)     # Load the file again every time
+            generate_edges(path)
+        return best_time(run, repeat = repeat)
+
+def bench_determine_route(size: int, repeat: int) -> float:
+    with synthetic_network(max(2 * size, 50)):
+        orders = generate_orders(size, taxicab_distances.get_network().names)
+        determine_route(F = float("inf"), W0 = EMPTY_WEIGHT_1, orders = list(orders))   # Warm the distance and fuel tables
+        return best_time(lambda orders: determine_route(F = float("inf"), W0 = EMPTY_WEIGHT_1, orders = orders),
+                         setup = lambda: list(orders), repeat = repeat)
+
+# Supplies of the knapsack workload. The deprecated solver works in 10 g steps, so none is lighter than that.
+KNAPSACK_SUPPLIES = ["scalpel", "syringe", "stethoscope", "bandages"]
+
+def knapsack_order(W: float) -> SupplyOrder:
+    """
+    Returns an order of KNAPSACK_SUPPLIES weighing about twice the capacity W (kg), so that neither
+    solver can return early with the whole order, and both are given the same problem.
+    """
+
+    set_weight = sum(SUPPLY_WEIGHT[SUPPLY_NAMES[supply]] for supply in KNAPSACK_SUPPLIES)
+    count = ceil(2 * W / set_weight)
+    return SupplyOrder(town = "Perth", supplies = Supplies(**{supply: count for supply in KNAPSACK_SUPPLIES}))
+
+def bench_select_maximum_of_supplies(size: int, repeat: int) -> float:
+    order = knapsack_order(size)
+    return best_time(lambda: select_maximum_of_supplies(size, order, use_cache = False), repeat = repeat)
+
+def bench_DEPRECATED_select_maximum_of_supplies(size: int, repeat: int) -> float:
+    order = knapsack_order(size)
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):    # It prints its table's last cell
+            DEPRECATED_select_maximum_supplies.select_maximum_of_supplies(size, order)
+    return best_time(run, repeat = repeat)
+
+def _random_matrix(n: int, seed: int) -> Matrix:
+    rng = random.Random(seed)
+    return Matrix([[rng.randint(-100, 100) for _ in range(n)] for _ in range(n)])
+
+def bench_matrix_matmul(size: int, repeat: int) -> float:
+    A, B = _random_matrix(size, SEED), _random_matrix(size, SEED + 1)
+    return best_time(lambda: A @ B, repeat = repeat)
+
+def bench_matrix_add(size: int, repeat: int) -> float:
+    A, B = _random_matrix(size, SEED), _random_matrix(size, SEED + 1)
+    return best_time(lambda: A + B, repeat = repeat)
+
+def bench_matrix_str(size: int, repeat: int) -> float:
+    A = _random_matrix(size, SEED)
+    return best_time(lambda: str(A), repeat = repeat)
+
+def _random_weights(k: int) -> list[float]:
+    rng = random.Random(SEED)
+    return [rng.uniform(0, 50_000) for _ in range(k)]
+
+def bench_determine_planes(size: int, repeat: int) -> float:
+    weights = _random_weights(size)
+    return best_time(lambda: [determine_planes(W) for W in weights], repeat = repeat)
+
+def bench_plane_counts(size: int, repeat: int) -> float:
+    weights = _random_weights(size)
+    if np is not None:
+        weights = np.asarray(weights)
+    return best_time(lambda: plane_counts(weights), repeat = repeat)
+
+BENCHMARKS = {name: globals()[f"bench_{name}"] for name in SIZES}
+
+def run_benchmarks(names: list[str] = None, quick: bool = False, repeat: int = REPEAT) -> dict:
+    """
+    Returns {"meta": {...}, "results": {benchmark: {size: seconds}}}.
+    """
+
+    results: dict[str, dict[str, float]] = {}
+    for name in names or BENCHMARKS:
+        sizes = SIZES[name][:1] if quick else SIZES[name]
+        results[name] = {str(size): BENCHMARKS[name](size, repeat) for size in sizes}
+
+    meta = {
+        "python": platform.python_version(),
+        "numpy": np.__version__ if np is not None else None,
+        "machine": platform.machine(),
+        "seed": SEED,
+        "repeat": repeat,
+    }
+    return {"meta": meta, "results": results}
+
+def compare(current: dict, baseline: dict, threshold: float = THRESHOLD) -> list[str]:
+    """
+    Returns a line for every timing slower than the baseline by more than threshold times
+    (and by more than NOISE_FLOOR seconds). Timings missing from either side are skipped.
+    """
+
+    regressions = []
+    for name, sizes in current["results"].items():
+        for size, seconds in sizes.items():
+            before = baseline.get("results", {}).get(name, {}).get(size)
+            if before is None: continue
+            if seconds > before * threshold and seconds - before > NOISE_FLOOR:
+                regressions.append(f"{name}[{size}]: {before:.6f} s -> {seconds:.6f} s ({seconds / before:.2f}x)")
+    return regressions
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description = "Times the main routines on synthetic workloads.")
+    parser.add_argument("--only", nargs = "+", choices = list(BENCHMARKS), help = "benchmarks to run (default: all)")
+    parser.add_argument("--quick", action = "store_true", help = "smallest size of each benchmark only")
+    parser.add_argument("--repeat", type = int, default = REPEAT, help = "runs per timing, the best is kept")
+    parser.add_argument("--output", help = "write the JSON results to this file instead of stdout")
+    parser.add_argument("--compare", metavar = "BASELINE", help = "JSON results to flag regressions against")
+    parser.add_argument("--threshold", type = float, default = THRESHOLD, help = "slowdown factor counted as a regression")
+    args = parser.parse_args(argv)
+
+    current = run_benchmarks(args.only, args.quick, args.repeat)
+
+    if args.compare:
+        with open(args.compare) as f:
+            current["regressions"] = compare(current, json.load(f), args.threshold)
+
+    text = json.dumps(current, indent = 2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    for line in current.get("regressions", []):
+        print("Regression:", line, file = sys.stderr)
+    return 1 if current.get("regressions") else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
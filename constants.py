@@ -7,6 +7,7 @@ UFV2 = UFV1 * 1.5   # Litres
 
 SMALLER_PLANE = f"Smaller Plane: {C1}kg"
 LARGER_PLANE  = f"Larger Plane: {C2}kg"
+PLANE_CAPACITY = {SMALLER_PLANE: C1, LARGER_PLANE: C2}
 
 MARKET_FUEL_COST_PER_LITRE = 2.268
 EMPTY_WEIGHT_1 = 4_990
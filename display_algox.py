@@ -9,8 +9,9 @@ node_config = {"shape": "rect", "size": [23, 8], "labels": {}}
 
 def main():
     
-    nodes = generate_nodes()
-    edges = generate_edges()
+    network = get_network()
+    nodes = network.names
+    edges = network.edges
 
     graph.nodes(nodes).add(shape="rect", size=(45, 8))
     graph.edges(edges).add(labels=lambda e: {0: {"text": edges[e]}})
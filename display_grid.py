@@ -1,24 +1,15 @@
-from matrix import Matrix
-from os.path import join, dirname
+from sparse_matrix import SparseMatrix
+from taxicab_distances import get_network
 
 if __name__ == "__main__":
 
-    grid = Matrix(55, 40)
+    grid = SparseMatrix(55, 40)
     grid.zero_cell_placeholder = "0"
 
-    with open(join(dirname(__file__), "locations.txt"), "r") as f:
-        locations = f.read()
+    network = get_network()
 
-    for location in locations.split("\n"):
-
-        s = location.split()
-        if len(s) < 2: continue
-
-        pair = [int(s[0][:-1]), int(s[1])]
-        name = " ".join(s[2:-1])
-        postcode = s[-1]
-        
+    for pair, postcode in zip(network.coordinates, network.postcodes):
         grid[*pair] = postcode
 
-    print(grid)
-
+    grid.render()
+    print()
@@ -0,0 +1,183 @@
+"""
+Fleet dispatcher
+Plans a day of orders across the whole fleet, instead of alternating the small and large planes.
+
+Orders are swept around the source by bearing, so towns in the same direction share a sortie, and a
+sortie is closed once no plane can carry its payload or fly its route within the plane's fuel.
+Each sortie is then flown by the plane that burns the least fuel on it, with that plane's own
+payload capacity (C1/C2), fuel capacity (UFV1/UFV2) and empty weight.
+"""
+
+from math import atan2, ceil, hypot
+from typing import Callable, Iterable, Iterator
+
+from taxicab_distances import get_network
+from supply import SupplyOrder, OrderBook
+from constants import C1, C2, UFV1, UFV2, EMPTY_WEIGHT_1, EMPTY_WEIGHT_2, MARKET_FUEL_COST_PER_LITRE, SMALLER_PLANE, LARGER_PLANE
+from select_maximum_supplies import split_order_into_loads
+from generate_trip import determine_route, determine_route_exact, improve_route, HELD_KARP_MAX_STOPS
+
+class Plane:
+    def __init__(self, name: str, label: str, C: float, F: float, W0: float):
+        self.name = name        # e.g. "Small"
+        self.label = label      # e.g. SMALLER_PLANE
+        self.C = C              # Full fuel payload capacity (kg)
+        self.F = F              # Usable fuel volume (L)
+        self.W0 = W0            # Empty weight (kg)
+
+    def __repr__(self) -> str:
+        return self.label
+
+PLANES: list[Plane] = [
+    Plane("Small", SMALLER_PLANE, C1, UFV1, EMPTY_WEIGHT_1),
+    Plane("Large", LARGER_PLANE, C2, UFV2, EMPTY_WEIGHT_2),
+]
+
+class Sortie:
+    """
+    One flight of one plane: the route returned by the route solver, flown by plane.
+    """
+
+    def __init__(self, plane: Plane, route: tuple):
+        self.plane = plane
+        self.path, self.path_fuel_usages, self.path_orders, self.fT, _, _ = route
+
+    @property
+    def orders(self) -> list[SupplyOrder]:
+        return [order for order in self.path_orders if order is not None]
+
+    @property
+    def net_weight(self) -> float:
+        return sum(order.net_weight for order in self.orders)
+
+    @property
+    def net_value(self) -> float:
+        return sum(order.net_value for order in self.orders)
+
+    @property
+    def fuel_cost(self) -> float:
+        return self.fT * MARKET_FUEL_COST_PER_LITRE
+
+def iter_split(orders: Iterable[SupplyOrder], capacity: float) -> Iterator[SupplyOrder]:
+    """
+    Yields the orders with every order heavier than capacity split into loads of at most capacity,
+    in one pass per order (see split_order_into_loads(...)). With room for the larger plane, the loads
+    follow the plane sequence of determine_planes(...), otherwise they are all of capacity.
+    Orders are only read and split as the pieces are consumed.
+    """
+
+    for order in orders:
+        if order.net_weight <= capacity:
+            yield order
+        elif capacity >= C2:
+            yield from split_order_into_loads(order)
+        else:
+            yield from split_order_into_loads(order, [capacity] * ceil(order.net_weight / capacity), capacity)
+
+def split_oversized(orders: "list[SupplyOrder] | OrderBook", capacity: float) -> list[SupplyOrder]:
+    return list(iter_split(orders, capacity))
+
+def sweep(orders: list[SupplyOrder], source: str = "Perth") -> list[SupplyOrder]:
+    """
+    Returns the orders sorted by bearing from source (then by distance), starting after the widest
+    gap in bearings, so no group of neighbouring towns is cut in half at the start of the sweep.
+    """
+
+    network = get_network()
+    ids = network.distances.ids
+    x0, y0 = network.coordinates[ids[source]]
+
+    keyed = []
+    for order in orders:
+        x, y = network.coordinates[ids[order.town]]
+        keyed.append((atan2(y - y0, x - x0), hypot(x - x0, y - y0), order))
+    keyed.sort(key = lambda k: (k[0], k[1]))
+
+    if len(keyed) < 2:
+        return [order for _, _, order in keyed]
+
+    # Gap before each order, including the wrap-around from the last bearing back to the first.
+    start, widest = 0, -1.0
+    for i in range(len(keyed)):
+        gap = (keyed[i][0] - keyed[i - 1][0]) % 6.283185307179586
+        if gap > widest:
+            start, widest = i, gap
+
+    return [order for _, _, order in keyed[start:] + keyed[:start]]
+
+def plan_sortie(orders: list[SupplyOrder], source: str = "Perth", planes: list[Plane] = PLANES,
+                route_solver: Callable = determine_route) -> Sortie | None:
+    """
+    Returns the Sortie flying every order by the plane using the least fuel,
+    or None if no plane can carry the orders and fly them within its fuel capacity
+    (or, with determine_route_exact, if they are for more towns than Held-Karp takes).
+    """
+
+    if route_solver is determine_route_exact and len({order.town for order in orders}) > HELD_KARP_MAX_STOPS:
+        return None
+
+    net_weight = sum(order.net_weight for order in orders)
+
+    best = None
+    for plane in planes:
+        if net_weight > plane.C:
+            continue
+        route = improve_route(route_solver(F = plane.F, W0 = plane.W0, source = source, orders = OrderBook(orders)), W0 = plane.W0)
+        if route[5] or route[3] > plane.F:             # Some orders left unserved, or over the fuel capacity
+            continue
+        if best is None or route[3] < best.fT:
+            best = Sortie(plane, route)
+    return best
+
+def dispatch(orders: "list[SupplyOrder] | OrderBook", source: str = "Perth", planes: list[Plane] = PLANES,
+             route_solver: Callable = determine_route) -> list[Sortie]:
+    """
+    Returns the sorties serving every order.
+    Orders heavier than the largest plane are split first. The rest are swept by bearing from source
+    and added to the current sortie while some plane can fly it, and it burns no more fuel than
+    flying the order on a sortie of its own. Otherwise the sortie is closed.
+    """
+
+    orders = split_oversized(orders, max(plane.C for plane in planes))
+
+    sorties: list[Sortie] = []
+    current: list[SupplyOrder] = []
+    planned: Sortie | None = None
+
+    for order in sweep(orders, source):
+        trial = plan_sortie(current + [order], source, planes, route_solver)
+        if trial is not None and planned is None:
+            current, planned = [order], trial
+            continue
+
+        # e.g. a second Small sortie can burn less than moving the whole sortie up to the Large plane.
+        alone = plan_sortie([order], source, planes, route_solver)
+        if trial is not None and (alone is None or trial.fT <= planned.fT + alone.fT):
+            current, planned = current + [order], trial
+            continue
+
+        if planned is not None:
+            sorties.append(planned)
+        current, planned = [order], alone
+        if planned is None:
+            raise ValueError(f"No plane can fly the order for {order.town} ({order.net_weight:.3f} kg) within its fuel capacity")
+
+    if planned is not None:
+        sorties.append(planned)
+
+    return sorties
+
+def report(sorties: list[Sortie]) -> dict[str, float]:
+    """
+    Totals over the day: the number of sorties (overall and per plane), litres of fuel, fuel cost,
+    and the weight and value delivered.
+    """
+
+    totals = {"sorties": len(sorties)}
+    for plane in PLANES:
+        totals[f"{plane.name.lower()} sorties"] = sum(1 for sortie in sorties if sortie.plane.name == plane.name)
+    totals["litres"] = sum(sortie.fT for sortie in sorties)
+    totals["fuel cost"] = totals["litres"] * MARKET_FUEL_COST_PER_LITRE
+    totals["weight"] = sum(sortie.net_weight for sortie in sorties)
+    totals["value"] = sum(sortie.net_value for sortie in sorties)
+    return totals
@@ -8,25 +8,71 @@ Inputs:
 - orders'list': List of SupplyOrder(s) (A custom ADT containing town and supplies). 
 """
 
+import argparse
 from typing import Union
 from math import log, exp
+from array import array
+from operator import add, mul, itemgetter
+from itertools import repeat
+import time
+from weakref import WeakKeyDictionary
 
-from taxicab_distances import generate_nodes, generate_edges
-from supply import SupplyOrder, Supplies
-from constants import C1, C2, UFV1, UFV2, EMPTY_WEIGHT_1, EMPTY_WEIGHT_2, MARKET_FUEL_COST_PER_LITRE, SMALLER_PLANE, LARGER_PLANE
-from select_maximum_supplies import select_maximum_of_supplies
+from taxicab_distances import Network, get_network
+from supply import SupplyOrder, Supplies, OrderBook
+from constants import MARKET_FUEL_COST_PER_LITRE
 
-nodes = generate_nodes()
-edges = generate_edges()
+FUEL_RATE = .02    # Litres per kg of weight, scaling the arbitrary fuel usage equation
 
-def neighbours(node) -> list[str]:
-    n = []
-    for edge in edges:
-        if edge[0] == node:
-            n.append(edge[1])
-        elif edge[1] == node:
-            n.append(edge[0])
-    return n
+def fuel_coefficient(D: float) -> float:
+    """
+    Returns the fuel used per kg of weight over distance D.
+    The fuel usage equation is linear in the weight, so this only depends on the edge.
+    """
+
+    if D == 0: return 0
+
+    # Arbitrary fuel usage equation
+    return (log(D + 1) + exp(-D) - 1) * FUEL_RATE
+
+class FuelCoefficients:
+    """
+    Table of fuel_coefficient(D) for every pair of towns, by town id.
+    Each row is computed the first time it is needed and then kept, so the equation is evaluated
+    at most once per edge and the route search only multiplies weights by table entries.
+    """
+
+    def __init__(self, distances):
+        self.distances = distances
+        self._rows: dict[int, array] = {}
+
+    def row(self, u: int) -> array:
+        if u not in self._rows:
+            self._rows[u] = array("d", map(fuel_coefficient, self.distances.row(u)))
+        return self._rows[u]
+
+    def coefficient(self, u: int, v: int) -> float:
+        return self.row(u)[v]
+
+    def candidate_fuel(self, T: int, candidates: list[int], W_out: float, W_back: list[float], source: int) -> tuple[list[float], list[float]]:
+        """
+        Fuel for every candidate leg T -> v carrying W_out, and for each return leg v -> source
+        carrying the matching entry of W_back, in one pass over the table.
+        """
+
+        row = self.row(T)
+        back = self.row(source)         # Distances are symmetric, so v -> source is source -> v
+        out_fuel = [W_out * row[v] for v in candidates]
+        back_fuel = list(map(mul, W_back, [back[v] for v in candidates]))
+        return out_fuel, back_fuel
+
+# Keyed by the Network itself, so a table is dropped with its network rather than outliving it.
+_fuel_coefficients: "WeakKeyDictionary[Network, FuelCoefficients]" = WeakKeyDictionary()
+
+def get_fuel_coefficients() -> FuelCoefficients:
+    network = get_network()
+    if network not in _fuel_coefficients:
+        _fuel_coefficients[network] = FuelCoefficients(network.distances)
+    return _fuel_coefficients[network]
 
 def f(u, v, W: int) -> int:
     """
@@ -36,30 +82,14 @@ def f(u, v, W: int) -> int:
     - W: weight of inventory
     """
 
-    s = (u, v)
+    ids = get_network().distances.ids
 
-    # Pull distance between u and v
-    D = 0
-    if s in edges:
-        D = edges[s]
-    if s[::-1] in edges:
-        D = edges[s[::-1]]
-
-    if D == 0: return 0
-
-    # Arbitrary fuel usage equation
-    fuel_usage = W * (log(D + 1) + exp(-D) - 1) * .02
+    # Pull the precomputed coefficient of the edge between u and v
+    fuel_usage = W * get_fuel_coefficients().coefficient(ids[u], ids[v])
 
     return fuel_usage
 
-def choose_order_index_by_town(orders: list[SupplyOrder], town: str) -> int:
-
-    for i in range(len(orders)):
-        if orders[i].town == town:
-            return i
-    return None
-
-def determine_route(F: int, W0: int, source: str = "Perth",  orders: list[SupplyOrder] = None) -> Union[list[str], list[int], list[list[SupplyOrder]], int, int]:
+def determine_route(F: int, W0: int, source: str = "Perth",  orders: "list[SupplyOrder] | OrderBook" = None) -> Union[list[str], list[int], list[list[SupplyOrder]], int, int]:
 
     if orders is None:
         print("No orders today - You can go off work!")
@@ -71,56 +101,55 @@ def determine_route(F: int, W0: int, source: str = "Perth",  orders: list[Supply
 
     fT: int                              = 0         # Total fuel consumed
     T: None | str                        = None      # Target/Destination
-    
-    W = 0                                            # Net weight of order
-    for order in orders:
-        W += order.net_weight
-    
-    while len(path) <= len(nodes):
 
-        if path[-1] == T:
-            break
+    # Orders by town. A list of orders is indexed into a book, and left holding the unserved orders.
+    book = orders if isinstance(orders, OrderBook) else OrderBook(orders)
 
-        T = path[-1]
+    W = book.net_weight                              # Net weight of order
 
-        # Iteratively find smallest edge not already in the circuit.
+    distances = get_network().distances
+    names, ids = distances.names, distances.ids
+    fuel = get_fuel_coefficients()
+    s = ids[source]
 
-        fmin = float('inf')     # Min fuel
-        Wmin = None             # Min weight
-        Tmin = None             # Min destination
-        order_index = None      # Order index of the min destination
+    while len(book) > 0:
+
+        T = path[-1]
+        t = ids[T]
 
-        towns_in_order_list = [order.town for order in orders]
+        # Iteratively find smallest edge to a town with orders left.
+        # Fuel grows with distance at a fixed weight, so the first feasible neighbour (nearest first) is the smallest.
+        # The neighbour index of T is sorted once (ties in file order), and filtered by the towns in the book.
 
-        for v in neighbours(T):
-            if v in path: continue
-            if v not in towns_in_order_list: continue
+        candidates = [v for v in distances.nearest(t) if names[v] in book and v != s]            # O(n), O(1) per town
+        if not candidates: break
 
-            aux = f(T, v, W0 + W)
+        # Every order for the town is dropped off together.
+        delta_Ws = [book.weight_at(names[v]) for v in candidates]
 
-            # Stores order index through memoisation to avoid calling choose_order_index_by_town(...) more than once. 
-            i = choose_order_index_by_town(orders, v)
-            delta_W = orders[i].net_weight
-            NEW_W = W - delta_W
-            rem = f(v, source, W0 + NEW_W)
+        # Outbound fuel at the current weight, and return fuel once the candidate's orders are dropped off.
+        auxs, rems = fuel.candidate_fuel(t, candidates, W0 + W, [W0 + W - delta_W for delta_W in delta_Ws], s)
 
+        Tmin = None             # Min destination
+        for v, delta_W, aux, rem in zip(candidates, delta_Ws, auxs, rems):
             if fT + aux + rem > F: continue
 
-            if aux >= fmin: continue
+            fmin = aux          # Min fuel
+            Tmin = names[v]
+            break
 
-            fmin = aux
-            Tmin = v
-            Wmin = delta_W
-            order_index = i
+        if Tmin is None:
+            break
 
-        # Add closest (unvisited) neighbour to circuit and add the weight to the total fuel consumed.
+        # Add closest neighbour with orders to the circuit and add the weight to the total fuel consumed.
+        # Further orders for the same town are listed as extra stops with no fuel used in between.
 
-        if Tmin is not None:
+        for k, order in enumerate(book.pop_town(Tmin)):
             path.append(Tmin)
-            fT += fmin
-            W -= Wmin
-            path_fuel_usages.append(fmin)
-            path_orders.append(orders.pop(order_index))
+            fT += fmin if k == 0 else 0
+            path_fuel_usages.append(fmin if k == 0 else 0)
+            path_orders.append(order)
+        W = book.net_weight
 
     # Complete the circuit by appending the source node 
     path.append(source)
@@ -130,6 +159,263 @@ def determine_route(F: int, W0: int, source: str = "Perth",  orders: list[Supply
     fT += fuel_usage
     path_fuel_usages.append(fuel_usage)
 
+    if book is not orders:
+        orders[:] = list(book)
+
+    return path, path_fuel_usages, path_orders, fT, W, orders
+
+HELD_KARP_MAX_STOPS = 18     # 2^n * n^2 work, so larger order sets should use determine_route(...)
+
+def determine_route_exact(F: int, W0: int, source: str = "Perth",  orders: "list[SupplyOrder] | OrderBook" = None) -> Union[list[str], list[int], list[list[SupplyOrder]], int, int]:
+    """
+    Exact alternative to determine_route(...) using the Held-Karp bitmask DP.
+    Finds the minimum-fuel circuit from source through every ordered town, where each leg burns
+    fuel for the plane plus the orders still on board, within the fuel capacity F.
+    The DP runs over the distinct towns, and every order for a town is dropped off on the one visit,
+    as in determine_route(...), so at most HELD_KARP_MAX_STOPS towns are allowed.
+    If no circuit serving every order fits in F, the circuit serving the most orders (then the most
+    value) is returned, and only those orders are loaded.
+
+    Returns the same tuple as determine_route(...): path, path_fuel_usages, path_orders, fT, W, orders,
+    where W is the weight of the unserved orders and orders is the list of unserved orders.
+    """
+
+    if orders is None:
+        print("No orders today - You can go off work!")
+        return
+
+    orders = list(orders)                               # A list or an OrderBook; neither is modified
+
+    # One stop per town, holding all of its orders (in the order they were given).
+    groups: dict[str, list[SupplyOrder]] = {}
+    for order in orders:
+        groups.setdefault(order.town, []).append(order)
+    towns = list(groups)
+
+    n = len(towns)
+    if n > HELD_KARP_MAX_STOPS:
+        raise ValueError(f"Held-Karp is limited to {HELD_KARP_MAX_STOPS} towns, got {n}")
+
+    ids = get_network().distances.ids
+    fuel = get_fuel_coefficients()
+    INF = float('inf')
+
+    stops = [ids[town] for town in towns]
+    s = ids[source]
+    weights = [sum(order.net_weight for order in groups[town]) for town in towns]
+    values = [sum(order.net_value for order in groups[town]) for town in towns]
+    counts = [len(groups[town]) for town in towns]
+
+    C = [[fuel.coefficient(a, b) for b in stops] for a in stops]    # Coefficients between stops
+    to_source = [fuel.coefficient(a, s) for a in stops]
+    from_source = [fuel.coefficient(s, a) for a in stops]
+
+    full = 1 << n
+
+    # Weight of each subset of stops, built from the subset without its lowest stop.
+    subset_weight = [0.0] * full
+    for R in range(1, full):
+        low = R & -R
+        subset_weight[R] = subset_weight[R ^ low] + weights[low.bit_length() - 1]
+
+    # g[R * n + j]: least fuel to leave stop j carrying the orders of the stops in R (j not in R), deliver them all
+    # and return to source. nxt[R * n + j] is the stop visited next on that route.
+    g = array("d", [INF]) * (full * n)
+    nxt = array("b", [-1]) * (full * n)
+
+    for j in range(n):
+        if W0 * to_source[j] <= F:
+            g[j] = W0 * to_source[j]
+
+    for R in range(1, full):                                # Every subset after all of its own subsets
+        members = [k for k in range(n) if R >> k & 1]
+        rest = [g[(R ^ (1 << k)) * n + k] for k in members]
+        if min(rest) == INF: continue                       # Prune: no feasible way to finish from R
+
+        carried = W0 + subset_weight[R]
+        pick = itemgetter(*members) if len(members) > 1 else (lambda row, k = members[0]: (row[k],))
+
+        for j in range(n):
+            if R >> j & 1: continue
+            totals = list(map(add, map(mul, repeat(carried), pick(C[j])), rest))
+            best = min(totals)
+            if best > F: continue                           # Prune: already over the fuel capacity
+            g[R * n + j] = best
+            nxt[R * n + j] = members[totals.index(best)]
+
+    def circuit(R: int) -> tuple[int, float]:
+        # First stop and least fuel of a circuit from source delivering the orders in R.
+        carried = W0 + subset_weight[R]
+        first, total = -1, INF
+        for k in range(n):
+            if not R >> k & 1: continue
+            cost = carried * from_source[k] + g[(R ^ (1 << k)) * n + k]
+            if cost < total:
+                first, total = k, cost
+        return first, total
+
+    # Load every order if possible, otherwise the subset with the most orders, then value, then least fuel.
+    best_R, best_first, best_total = 0, -1, 0.0
+    first, total = circuit(full - 1)
+    if total <= F:
+        best_R, best_first, best_total = full - 1, first, total
+    else:
+        best_key = (0, 0.0, 0.0)
+        for R in range(1, full):
+            first, total = circuit(R)
+            if total > F: continue
+            key = (sum(count for k, count in enumerate(counts) if R >> k & 1),
+                   sum(value for k, value in enumerate(values) if R >> k & 1), -total)
+            if key > best_key:
+                best_key, best_R, best_first, best_total = key, R, first, total
+
+    # Walk the stored choices to rebuild the circuit.
+    path: list[str]                      = [source]
+    path_fuel_usages: list[int]          = []
+    path_orders: list[list[SupplyOrder]] = []
+
+    R, j = best_R, best_first
+    if j != -1:
+        path_fuel_usages.append((W0 + subset_weight[R]) * from_source[j])
+    while j != -1:
+        # Further orders for the same town are listed as extra stops with no fuel used in between.
+        for order in groups[towns[j]]:
+            path.append(towns[j])
+            path_orders.append(order)
+        path_fuel_usages.extend([0] * (counts[j] - 1))
+        R ^= 1 << j
+        k = nxt[R * n + j] if R else -1
+        if k == -1:
+            path_fuel_usages.append(W0 * to_source[j])
+        else:
+            path_fuel_usages.append((W0 + subset_weight[R]) * C[j][k])
+        j = k
+
+    path.append(source)
+    path_orders.append(None)
+    if not path_fuel_usages:
+        path_fuel_usages.append(0)
+
+    remaining = [order for k, town in enumerate(towns) if not best_R >> k & 1 for order in groups[town]]
+    W = sum(order.net_weight for order in remaining)
+
+    return path, path_fuel_usages, path_orders, best_total, W, remaining
+
+IMPROVE_TIME_BUDGET = 0.1        # Seconds of local search per route
+IMPROVE_MAX_ITERATIONS = 1_000   # Improving moves per route
+OR_OPT_MAX_SEGMENT = 3           # Longest run of stops moved by one Or-opt move
+
+def improve_route(route: tuple, W0: int, time_budget: float = IMPROVE_TIME_BUDGET, max_iterations: int = IMPROVE_MAX_ITERATIONS) -> Union[list[str], list[int], list[list[SupplyOrder]], int, int]:
+    """
+    Local search pass over a route returned by determine_route(...) or determine_route_exact(...),
+    applying improving 2-opt moves (reverse a run of stops) and Or-opt moves (move a run of up to
+    OR_OPT_MAX_SEGMENT stops elsewhere) until none is left, time_budget runs out or max_iterations
+    moves have been made.
+
+    Each leg burns fuel for the plane (W0) plus the orders still on board, and the return leg for
+    the plane alone. Orders not on the route are not carried. Moves are scored by the change in fuel
+    of the legs they touch, using prefix sums over the current route, so each candidate is O(1).
+
+    Returns the route in the same format, with path_fuel_usages and fT recomputed.
+    """
+
+    if route is None:
+        return route
+
+    path, path_fuel_usages, path_orders, fT, W, orders = route
+    source = path[0]
+
+    ids = get_network().distances.ids
+    fuel = get_fuel_coefficients()
+    coefficient = fuel.coefficient
+
+    # Position 0 and m + 1 are the source; positions 1..m are the stops.
+    stops: list[SupplyOrder] = [order for order in path_orders if order is not None]
+    m = len(stops)
+
+    deadline = time.perf_counter() + time_budget
+    iterations = 0
+
+    while True:
+        nodes = [ids[source]] + [ids[order.town] for order in stops] + [ids[source]]
+        wts = [0] + [order.net_weight for order in stops] + [0]
+
+        # S[q]: weight on board when leaving position q - 1, i.e. carried on leg q.
+        S = [0.0] * (m + 2)
+        for q in range(m, 0, -1):
+            S[q] = S[q + 1] + wts[q]
+
+        # c[q]: coefficient of leg q (position q - 1 -> q). P1, P2: prefix sums of c[q] and c[q] * S[q].
+        c = [0.0] + [coefficient(nodes[q - 1], nodes[q]) for q in range(1, m + 2)]
+        P1 = [0.0] * (m + 2)
+        P2 = [0.0] * (m + 2)
+        for q in range(1, m + 2):
+            P1[q] = P1[q - 1] + c[q]
+            P2[q] = P2[q - 1] + c[q] * S[q]
+
+        if iterations >= max_iterations or time.perf_counter() > deadline:
+            break
+
+        move = None
+        for i in range(1, m + 1):
+            # 2-opt: reverse positions i..j. Legs inside the run swap which stops are still on board,
+            # so leg q goes from carrying S[q] to S[i] + S[j + 1] - S[q].
+            for j in range(i + 1, m + 1):
+                delta = (coefficient(nodes[i - 1], nodes[j]) - c[i]) * (W0 + S[i]) \
+                      + (coefficient(nodes[i], nodes[j + 1]) - c[j + 1]) * (W0 + S[j + 1]) \
+                      + (S[i] + S[j + 1]) * (P1[j] - P1[i]) - 2 * (P2[j] - P2[i])
+                if delta < -1e-9:
+                    move = ("2-opt", i, j)
+                    break
+            if move: break
+
+            # Or-opt: move positions i..e between positions p and p + 1.
+            for e in range(i, min(i + OR_OPT_MAX_SEGMENT, m + 1)):
+                W_segment = S[i] - S[e + 1]
+                removed = c[i] * (W0 + S[i]) + c[e + 1] * (W0 + S[e + 1])
+                inside = P1[e] - P1[i]                      # Legs within the segment
+
+                for p in range(0, m + 1):
+                    if i - 1 <= p <= e: continue
+                    if p > e:                               # Later: the stops in between are now served first
+                        W_between = S[e + 1] - S[p + 1]
+                        delta = coefficient(nodes[i - 1], nodes[e + 1]) * (W0 + S[i]) \
+                              + coefficient(nodes[p], nodes[i]) * (W0 + S[p + 1] + W_segment) \
+                              + (coefficient(nodes[e], nodes[p + 1]) - c[p + 1]) * (W0 + S[p + 1]) \
+                              - removed + W_segment * (P1[p] - P1[e + 1]) - W_between * inside
+                    else:                                   # Earlier: the stops in between are now served after
+                        W_between = S[p + 1] - S[i]
+                        delta = (coefficient(nodes[p], nodes[i]) - c[p + 1]) * (W0 + S[p + 1]) \
+                              + coefficient(nodes[e], nodes[p + 1]) * (W0 + S[p + 1] - W_segment) \
+                              + coefficient(nodes[i - 1], nodes[e + 1]) * (W0 + S[e + 1]) \
+                              - removed - W_segment * (P1[i - 1] - P1[p + 1]) + W_between * inside
+                    if delta < -1e-9:
+                        move = ("or-opt", i, e, p)
+                        break
+                if move: break
+            if move: break
+
+        if move is None:
+            break
+
+        # Apply the move to the stops (position q is stops[q - 1]).
+        if move[0] == "2-opt":
+            _, i, j = move
+            stops[i - 1 : j] = stops[i - 1 : j][::-1]
+        else:
+            _, i, e, p = move
+            segment = stops[i - 1 : e]
+            if p > e:
+                stops[i - 1 : p] = stops[e : p] + segment
+            else:
+                stops[p : e] = segment + stops[p : i - 1]
+        iterations += 1
+
+    path = [source] + [order.town for order in stops] + [source]
+    path_orders = stops + [None]
+    path_fuel_usages = [c[q] * (W0 + S[q]) for q in range(1, m + 2)]
+    fT = sum(path_fuel_usages)
+
     return path, path_fuel_usages, path_orders, fT, W, orders
 
 def display(path_orders, path_fuel_usages, C):
@@ -208,7 +494,7 @@ def display(path_orders, path_fuel_usages, C):
 
 if __name__ == "__main__":
 
-    orders = [
+    orders = OrderBook([
         SupplyOrder(town = "Exmouth", supplies = Supplies(stitches = 10)),
         SupplyOrder(town = "Monkey Mia", supplies = Supplies(dialysismachine = 20)),
         SupplyOrder(town = "Broome", supplies = Supplies(nitrousoxidecanister = 30)),
@@ -220,39 +506,38 @@ if __name__ == "__main__":
         SupplyOrder(town = "Fitzroy Crossing", supplies = Supplies(stethoscope = 90)),
         SupplyOrder(town = "Halls Creek", supplies = Supplies(bandages = 100)),
         SupplyOrder(town = "Geraldton", supplies = Supplies(sanitiser = 110)),
-    ]
+    ])
     
-    previous_plane = LARGER_PLANE
-
-    added_count = 0
-    for i, order in enumerate(orders.copy()):
-        C = [C1, C2][int((i + added_count + int(previous_plane == SMALLER_PLANE)) % 2)]
-        if order.net_weight > C:
-            i += added_count
-
-            order = orders[i]
-            new, remainder = select_maximum_of_supplies(C, order)
-            orders[i] = new
-            orders.insert(i + 1, remainder)
-            added_count += 1
-
-    while len(orders) > 0:
-        if previous_plane == LARGER_PLANE:
-            previous_plane = SMALLER_PLANE
-            plane = "Small"
-            F = UFV1
-            C = C1
-            EW = EMPTY_WEIGHT_1
-        else:
-            previous_plane = LARGER_PLANE
-            plane = "Large"
-            F = UFV2
-            C = C2
-            EW = EMPTY_WEIGHT_2
-
-        path, path_fuel_usages, path_orders, fT, W, orders = determine_route(F = UFV1,
-                                                                             W0 = EW,
-                                                                             orders=orders)
-
-        # Display the final route to you, the Flight Discharge Officer.
-        display(path_orders, path_fuel_usages, C)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description = "Plans the day's sorties and displays each route.")
+    parser.add_argument("--exact", action = "store_true", help = "use the Held-Karp solver instead of the greedy one")
+    parser.add_argument("--orders", metavar = "FILE", help = "read the orders from a JSONL or CSV file (\"-\" for stdin) "
+                                                             "and plan them a chunk at a time, instead of the sample orders")
+    args = parser.parse_args()
+
+    route_solver = determine_route_exact if args.exact else determine_route
+
+    # Imported here, as fleet builds on the route solvers above.
+    from fleet import dispatch, report
+    from order_ingest import ingest
+
+    chunks = ingest(args.orders) if args.orders is not None else [orders]
+
+    totals = report([])                 # Every total at zero, in case there are no orders at all
+    for chunk in chunks:
+        sorties = dispatch(chunk, route_solver = route_solver)
+
+        for sortie in sorties:
+            plane = sortie.plane.name
+            F = sortie.plane.F
+            path, path_fuel_usages, path_orders, fT = sortie.path, sortie.path_fuel_usages, sortie.path_orders, sortie.fT
+
+            # Display the final route to you, the Flight Discharge Officer.
+            display(path_orders, path_fuel_usages, sortie.plane.C)
+
+        for key, value in report(sorties).items():
+            totals[key] += value
+
+    print(f"Sorties:             {totals['sorties']} ({totals['small sorties']} Small, {totals['large sorties']} Large)")
+    print(f"Total Fuel Consumed: {totals['litres']:.2f} L")
+    print(f"Total Fuel Cost:     {totals['fuel cost']:.2f} AUD")
+    print()
@@ -0,0 +1,178 @@
+"""
+Compiled binary cache of a location file (e.g. locations.txt), for loading large lists of towns quickly.
+
+The text file is compiled once into a sidecar next to it (.locations.txt.bin) laid out as:
+- a header: magic, town count, and the size, mtime and SHA-256 of the text file it was compiled from,
+- fixed-width int32 arrays of the x and y grid coordinates,
+- a name string table and a postcode string table, each of uint32 offsets followed by the UTF-8 strings.
+
+Later loads memory-map the sidecar instead of parsing the text. The sidecar is rebuilt whenever the
+text file's mtime or size changes and its hash no longer matches. If the sidecar cannot be written or
+read back, the text file is parsed as before.
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+from array import array
+from os.path import basename, dirname, join
+
+MAGIC = b"ALGOLOC2"
+HEADER = struct.Struct("=8sIQq32s")     # magic, count, source size, source mtime (ns), source SHA-256
+
+def read_locations(filename: str = "locations.txt") -> tuple[list[str], list[tuple[int, int]], list[str]]:
+    """
+    Returns the names, grid coordinates and postcodes of the towns in the given file, in file order.
+    """
+
+    with open(join(dirname(__file__), filename), "r") as f:
+        locations_string = f.read()
+
+    names: list[str] = []
+    coordinates: list[tuple[int, int]] = []
+    postcodes: list[str] = []
+
+    for location in locations_string.split("\n"):
+
+        s = location.split()
+        if len(s) < 2: continue
+
+        names.append(" ".join(s[2:-1]))
+        coordinates.append((int(s[0][:-1]), int(s[1])))
+        postcodes.append(s[-1])
+
+    return names, coordinates, postcodes
+
+class Coordinates:
+    """
+    Sequence of (x, y) grid coordinates backed by two int32 buffers, e.g. memory-mapped from the sidecar.
+    """
+
+    def __init__(self, xs, ys):
+        self.xs = xs
+        self.ys = ys
+
+    def __len__(self) -> int:
+        return len(self.xs)
+    def __getitem__(self, i: int) -> tuple[int, int]:
+        return (self.xs[i], self.ys[i])
+    def __iter__(self):
+        return zip(self.xs, self.ys)
+
+def sidecar_path(path: str) -> str:
+    return join(dirname(path), "." + basename(path) + ".bin")
+
+def _source_hash(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).digest()
+
+def _string_table(strings: list[str]) -> bytes:
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = array("I", [0])
+    for s in encoded:
+        offsets.append(offsets[-1] + len(s))
+    return offsets.tobytes() + b"".join(encoded)
+
+def _read_string_table(view: memoryview, offset: int, n: int) -> tuple[list[str], int]:
+    # Returns the n strings of the table at offset, and the offset just past the table.
+    offsets = view[offset : offset + 4 * (n + 1)].cast("I")
+    offset += 4 * (n + 1)
+    table = bytes(view[offset : offset + offsets[n]])
+    return [table[offsets[i] : offsets[i + 1]].decode("utf-8") for i in range(n)], offset + offsets[n]
+
+def compile_locations(path: str, sidecar: str) -> bytes:
+    """
+    Parses the text file at path and writes its sidecar. Returns the sidecar's contents.
+    """
+
+    names, coordinates, postcodes = read_locations(path)
+    stat = os.stat(path)
+
+    data = b"".join([
+        HEADER.pack(MAGIC, len(names), stat.st_size, stat.st_mtime_ns, _source_hash(path)),
+        array("i", [x for x, _ in coordinates]).tobytes(),
+        array("i", [y for _, y in coordinates]).tobytes(),
+        _string_table(names),
+        _string_table(postcodes),
+    ])
+
+    # Written to a temporary file first, so a reader never maps a half-written sidecar.
+    temporary = sidecar + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(data)
+    os.replace(temporary, sidecar)
+
+    return data
+
+def _is_fresh(path: str, sidecar: str) -> bool:
+    """
+    Whether the sidecar was compiled from the current text file. The hash is only checked when the
+    mtime or size changed, e.g. after a checkout that rewrote the file with the same contents.
+    """
+
+    try:
+        with open(sidecar, "rb") as f:
+            header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            return False
+        magic, count, size, mtime_ns, digest = HEADER.unpack(header)
+        if magic != MAGIC:
+            return False
+
+        stat = os.stat(path)
+        if stat.st_size == size and stat.st_mtime_ns == mtime_ns:
+            return True
+        if stat.st_size != size or _source_hash(path) != digest:
+            return False
+    except OSError:
+        return False
+
+    # Same contents under a new mtime: record it, so the next load skips the hash.
+    try:
+        with open(sidecar, "r+b") as f:
+            f.write(HEADER.pack(magic, count, size, stat.st_mtime_ns, digest))
+    except OSError:
+        pass
+    return True
+
+def _decode(buffer) -> tuple[list[str], Coordinates, list[str]]:
+    _, n, _, _, _ = HEADER.unpack_from(buffer, 0)
+    view = memoryview(buffer)
+
+    offset = HEADER.size
+    xs = view[offset : offset + 4 * n].cast("i")
+    offset += 4 * n
+    ys = view[offset : offset + 4 * n].cast("i")
+    offset += 4 * n
+
+    names, offset = _read_string_table(view, offset, n)
+    postcodes, offset = _read_string_table(view, offset, n)
+
+    return names, Coordinates(xs, ys), postcodes
+
+def load_locations(filename: str = "locations.txt") -> tuple[list[str], Coordinates, list[str]]:
+    """
+    Returns the names, grid coordinates and postcodes of the towns in the given file, like
+    read_locations(...), but through the compiled sidecar. If the sidecar cannot be written or decoded
+    (e.g. a read-only directory, or a damaged sidecar), the text file is parsed instead.
+    """
+
+    path = join(dirname(__file__), filename)
+    sidecar = sidecar_path(path)
+
+    if _is_fresh(path, sidecar):
+        try:
+            with open(sidecar, "rb") as f:
+                # The mapping stays open for as long as the coordinate buffers reference it.
+                return _decode(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        except (OSError, ValueError, TypeError, IndexError, struct.error):
+            pass                                # A damaged sidecar: compile it again
+
+    try:
+        return _decode(compile_locations(path, sidecar))
+    except (OSError, ValueError, TypeError, IndexError, struct.error):
+        names, coordinates, postcodes = read_locations(filename)
+        xs = array("i", [x for x, _ in coordinates])
+        ys = array("i", [y for _, y in coordinates])
+        return names, Coordinates(xs, ys), postcodes
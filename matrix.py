@@ -2,9 +2,30 @@
 The Matrix class
 __matmul__: Matrix multiplcation
 __add_    : Matrix addition
+
+Entries are kept in a single flat row-major buffer, with a row stride and a column stride to find
+entry (i, j) at index i * row_stride + j * col_stride. The buffer is:
+- an ndarray when NumPy is importable and the entries are all ints or all floats (@, + and transpose
+  are then vectorised),
+- otherwise an array('q') of ints or array('d') of floats,
+- otherwise a list, e.g. for a map grid holding town names, or a mix of ints and floats, which keeps
+  each entry's own type.
+
+Indexing a single row returns a MatrixRow view rather than a copy, and transpose() returns a view of
+the same buffer with the strides swapped. Either side copies the buffer before its first write.
 """
 
+import io
+import sys
+from array import array
+from operator import add, mul, sub
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+RENDER_CHUNK_ROWS = 256     # Rows per vectorised pass when measuring column widths for render(...)
 
 def dotp(v1, v2):
     """
@@ -18,51 +39,249 @@ def dotp(v1, v2):
     return s                    # O(1)
                                 # Total: O(dim v)
 
+def is_numeric(e) -> bool:
+    # bool is deliberately excluded, as NumPy would not keep it as a number.
+    if isinstance(e, bool):
+        return False
+    if np is not None and isinstance(e, np.number):
+        return True
+    return isinstance(e, (int, float))
+
+def is_float(e) -> bool:
+    return isinstance(e, float) or (np is not None and isinstance(e, np.floating))
+
+def make_buffer(values: list):
+    """
+    Returns the most compact flat buffer able to hold the values (see the module docstring).
+    """
+
+    if isinstance(values, array):       # Already typed, so numeric without checking every entry
+        return np.array(values) if np is not None else values
+
+    if not all(is_numeric(e) for e in values):
+        return values
+
+    float_count = sum(map(is_float, values))
+    if 0 < float_count < len(values):   # A float buffer would turn the ints into floats
+        return values
+
+    if np is not None:
+        nd = np.array(values)
+        if nd.dtype.kind in "iuf":      # Not the case for integers too large for int64
+            return nd
+        return values
+
+    if float_count == 0:
+        try:
+            return array("q", values)
+        except OverflowError:
+            return values
+    return array("d", values)
+
+class MatrixRow:
+    """
+    View of row i of a Matrix. Reads and writes go through the Matrix, so no entries are copied.
+    """
+
+    __slots__ = ("_matrix", "_i")
+
+    def __init__(self, matrix: "Matrix", i: int):
+        self._matrix = matrix
+        self._i = i
+
+    def __len__(self) -> int:
+        return self._matrix.width()
+    def __getitem__(self, j):
+        if type(j) == slice:
+            return self.tolist()[j]
+        return self._matrix[self._i, j]
+    def __setitem__(self, j: int, value):
+        self._matrix[self._i, j] = value
+    def __iter__(self):
+        return iter(self.tolist())
+    def __eq__(self, other) -> bool:
+        return self.tolist() == list(other)
+    def __repr__(self) -> str:
+        return repr(self.tolist())
+
+    def tolist(self) -> list:
+        return self._matrix._row_list(self._i)
+
 class Matrix:
+    __slots__ = ("zero_cell_placeholder", "_data", "_rows", "_cols", "_row_stride", "_col_stride", "_shared")
+
     def __init__(self, *args):
         self.zero_cell_placeholder: str = "0"
 
         if len(args) == 2:                  # Requires args = (m, n)
-            self.arr: list[list] = []
-
-            for y in range(args[0]):        # O(n)
-                self.arr.append([])         # O(1)
-                for x in range(args[1]):    # O(m)
-                    self.arr[y].append(0)   # O(1)
-                                            # Total: O(mn)
+            rows, cols = args
+            if np is not None:
+                data = np.zeros(rows * cols, dtype=np.int64)
+            else:
+                data = array("q", bytes(8 * rows * cols))   # O(mn), in a single allocation
+            self._set_storage(data, rows, cols)
 
         if len(args) == 1:                  # Requires args = M (the matrix as a list of lists)
-            self.arr: list[list] = args[0]
+            M = args[0]
+            if np is not None and isinstance(M, np.ndarray):
+                if M.ndim == 1:             # A single row, as for a flat list
+                    M = M.reshape(1, -1)
+                self._set_storage(np.ascontiguousarray(M).ravel(), *M.shape)
+                return
+
+            if len(M) == 0 or type(M[0]) not in (list, MatrixRow):  # The case of which the input is only a list. We must nest it.
+                M = [M]
+
+            values = [e for row in M for e in row]
+            self._set_storage(make_buffer(values), len(M), len(M[0]))
+
+    def _set_storage(self, data, rows: int, cols: int, row_stride: int = None, col_stride: int = 1):
+        self._data = data
+        self._rows = rows
+        self._cols = cols
+        self._row_stride = cols if row_stride is None else row_stride
+        self._col_stride = col_stride
+        self._shared = False                # Whether another Matrix is viewing the same buffer
+
+    @classmethod
+    def from_flat(cls, values: list, rows: int, cols: int) -> "Matrix":
+        """
+        Builds a rows * cols Matrix from a row-major list of entries.
+        """
+
+        M = cls.__new__(cls)
+        M.zero_cell_placeholder = "0"
+        M._set_storage(make_buffer(values), rows, cols)
+        return M
+
+    def _is_nd(self) -> bool:
+        return np is not None and isinstance(self._data, np.ndarray)
+
+    def _is_contiguous(self) -> bool:
+        return self._row_stride == self._cols and self._col_stride == 1
+
+    def _nd2d(self):
+        # Zero-copy 2D ndarray over the flat buffer, following the strides.
+        size = self._data.itemsize
+        return np.lib.stride_tricks.as_strided(self._data, shape=(self._rows, self._cols),
+                                               strides=(self._row_stride * size, self._col_stride * size))
+
+    def _index(self, i: int, j: int) -> int:
+        if i < 0: i += self._rows
+        if j < 0: j += self._cols
+        if not (0 <= i < self._rows and 0 <= j < self._cols):
+            raise IndexError(f"Matrix index {(i, j)} out of range")
+        return i * self._row_stride + j * self._col_stride
+
+    def _row_slice(self, i: int):
+        start = i * self._row_stride
+        return self._data[start : start + (self._cols - 1) * self._col_stride + 1 : self._col_stride]
+
+    def _row_list(self, i: int) -> list:
+        if i < 0: i += self._rows
+        if self._cols == 0: return []
+        row = self._row_slice(i)
+        return row.tolist() if type(row) != list else row
+
+    def _flat(self):
+        """
+        Returns the entries as a row-major buffer, which is the buffer itself unless this is a view.
+        """
+
+        if self._is_contiguous():
+            return self._data
+        if self._is_nd():
+            return self._nd2d().ravel()
+        flat = [e for i in range(self._rows) for e in self._row_slice(i)]
+        return array(self._data.typecode, flat) if type(self._data) != list else flat
+
+    def _own(self, values=None):
+        """
+        Gives this matrix its own contiguous buffer (copy on write), optionally replacing the entries.
+        """
+
+        if values is None:
+            values = self._flat()
+            if values is self._data:
+                values = values.copy() if self._is_nd() else values[:]
+        self._set_storage(values, self._rows, self._cols)
+
+    @property
+    def arr(self) -> list[MatrixRow]:
+        return [MatrixRow(self, i) for i in range(self._rows)]
+
+    @arr.setter
+    def arr(self, value: list[list]):
+        M = Matrix(value)
+        self._set_storage(M._data, M._rows, M._cols)
 
-        if type(self.arr[0]) != list:       # The case of which the input is only a list. We must nest it.
-            self.arr = [self.arr]
     def __getitem__(self, *pair: tuple) -> float:
+        if len(pair) == 1 and type(pair[0]) == tuple:
+            pair = pair[0]
         if len(pair) == 2:
-            i, j = pair
-            return self.arr[i][j]
-        elif len(pair) == 1:
-            if type(pair[0]) == tuple:
-                i, j = pair[0]
-                return self.arr[i][j]
-        return self.arr[pair[0]]
+            e = self._data[self._index(*pair)]
+            return e.item() if self._is_nd() else e
+        return MatrixRow(self, pair[0])
     def __setitem__(self, pair: tuple, value: float):
         i, j = pair
-        self.arr[i][j] = value
+        self._index(i, j)                               # Bounds check before any copy
+
+        if self._shared:
+            self._own()
+
+        if type(self._data) != list:
+            holds_floats = self._data.dtype.kind == "f" if self._is_nd() else self._data.typecode == "d"
+            if not is_numeric(value):
+                self._own(self._flat_list())            # Only a list can hold e.g. town names
+            elif is_float(value) and not holds_floats:
+                if self._data.any() if self._is_nd() else any(self._data):
+                    self._own(self._flat_list())        # A list keeps the other entries' type, e.g. 7 next to 0.25
+                else:
+                    # Still all zeros (e.g. from Matrix(m, n)), which print as the placeholder either way,
+                    # so the grid becomes a float grid rather than a list.
+                    n = self._rows * self._cols
+                    self._own(np.zeros(n) if self._is_nd() else array("d", bytes(8 * n)))
+            elif not is_float(value) and holds_floats:
+                if value == 0:
+                    value = 0.0                         # Zero prints as the placeholder either way
+                else:
+                    self._own(self._flat_list())
+            elif not holds_floats and not -2**63 <= value < 2**63:
+                self._own(self._flat_list())
+        self._data[self._index(i, j)] = value
     def width(self) -> int:
-        return len(self.arr[0])
+        return self._cols
     def height(self) -> int:
-        return len(self.arr)
-    def __str__(self) -> str:
-        s = "\n"
-        m, n = self.width(), self.height()
-        max_digit_count = [1] * m
-        contains_negative = [False] * m
-        
-        # Calculate maximum length of numbers in each column.
-        for y in range(n):
-            for x in range(m):
-                e = self[y, x]
-                if e == 0: e = self.zero_cell_placeholder
+        return self._rows
+
+    def _flat_list(self) -> list:
+        flat = self._flat()
+        return flat.tolist() if type(flat) != list else flat[:]
+
+    def _column_widths(self, rows: range, cols: range) -> tuple[list[int], list[bool]]:
+        """
+        Single pass over the window to find the printed width of each column and whether it holds a negative number.
+        """
+
+        placeholder = self.zero_cell_placeholder
+        max_digit_count = [1] * len(cols)
+        contains_negative = [False] * len(cols)
+
+        if isinstance(self, Matrix) and self._is_nd() and len(cols) > 0:
+            # Vectorised over RENDER_CHUNK_ROWS rows at a time, so the temporary strings stay bounded.
+            window = self._nd2d()[:, cols.start:cols.stop]
+            for y0 in range(rows.start, rows.stop, RENDER_CHUNK_ROWS):
+                chunk = window[y0:min(y0 + RENDER_CHUNK_ROWS, rows.stop)]
+                lengths = np.char.str_len(np.abs(chunk).astype(str))
+                lengths[chunk == 0] = len(placeholder)
+                max_digit_count = np.maximum(max_digit_count, lengths.max(axis=0)).tolist()
+                contains_negative = np.logical_or(contains_negative, (chunk < 0).any(axis=0)).tolist()
+            return max_digit_count, contains_negative
+
+        for y in rows:
+            row = self._row_list(y)
+            for x, e in enumerate(row[cols.start:cols.stop]):
+                if e == 0: e = placeholder
                 if type(e) == str:
                     max_digit_count[x] = max(len(e), max_digit_count[x])
                     continue
@@ -72,33 +291,64 @@ class Matrix:
                 if c <= max_digit_count[x]: continue
                 max_digit_count[x] = c
 
-        # String concatenation factoring in the length of each matrix entry.
-        for y, row in enumerate(self.arr):
-            if   y == 0:     s += "⎡"
-            elif y == n - 1: s += "⎣"
-            else:            s += "⎢"
+        return max_digit_count, contains_negative
+
+    def render(self, stream = None, rows: tuple[int, int] = None, cols: tuple[int, int] = None):
+        """
+        Writes the matrix to a text stream (sys.stdout by default), one row at a time.
+        rows, cols: optional (start, stop) window to render, e.g. rows=(0, 40) for the first 40 rows.
+
+        Only one row of text is held in memory at a time, so a huge grid can be dumped to a file.
+        str(matrix) is the same text rendered into a string.
+        """
+
+        if stream is None:
+            stream = sys.stdout
+
+        rows = range(*rows) if rows is not None else range(self.height())
+        cols = range(*cols) if cols is not None else range(self.width())
+        rows = range(max(rows.start, 0), min(rows.stop, self.height()))
+        cols = range(max(cols.start, 0), min(cols.stop, self.width()))
+        m, n = len(cols), len(rows)
+
+        # Calculate maximum length of numbers in each column.
+        max_digit_count, contains_negative = self._column_widths(rows, cols)
+
+        stream.write("\n")
 
-            for x, e in enumerate(row):
+        # Each row is joined from its pieces and written in one go, factoring in the length of each matrix entry.
+        for y, i in enumerate(rows):
+            s = []
+            if   y == 0:     s.append("⎡")
+            elif y == n - 1: s.append("⎣")
+            else:            s.append("⎢")
+
+            for x, e in enumerate(self._row_list(i)[cols.start:cols.stop]):
                 if e == 0: e = self.zero_cell_placeholder
                 if type(e) == str:
-                    if contains_negative[x]: s += " "
+                    if contains_negative[x]: s.append(" ")
                     v = (max_digit_count[x] - len(e) + 1)
                     k = v // 2
-                    s += " "*k + e + " "*(v-k)
+                    s.append(" "*k + e + " "*(v-k))
                     continue
-                if contains_negative[x] and e >= 0: s += " "
+                if contains_negative[x] and e >= 0: s.append(" ")
                 es = str(e)
                 v = (max_digit_count[x] - len(es) + int(e < 0))
                 k = v // 2
-                s += " "*k + es + " " * (v - k)
-                if x < m - 1: s += " "
-        
-            if   y == 0:     s += "⎤"
-            elif y == n - 1: s += "⎦"
-            else:            s += "⎥"
-            s += "\n"
-
-        return s
+                s.append(" "*k + es + " " * (v - k))
+                if x < m - 1: s.append(" ")
+
+            if   y == 0:     s.append("⎤")
+            elif y == n - 1: s.append("⎦")
+            else:            s.append("⎥")
+            s.append("\n")
+
+            stream.write("".join(s))
+
+    def __str__(self) -> str:
+        s = io.StringIO()
+        self.render(s)
+        return s.getvalue()
     def __repr__(self) -> str:
         return str(self)
 
@@ -107,19 +357,18 @@ class Matrix:
         Compute the transpose of the matrix.
         self: Matrix[n * m]
         Returns: Matrix[m * n]
-        """
 
-        m = []                             # O(1)
-        for _ in range(len(self.arr[0])):  # O(m)
-            m.append([])                   # O(1)
+        The transpose is a view of the same buffer with the strides swapped, so nothing is copied
+        until either matrix is written to.
+        """
 
-        for i in range(len(self.arr[0])):  # O(m)
-            for row in self.arr:           # O(n)
-                m[i].append(row[i])        # O(1)
+        T = Matrix.__new__(Matrix)                                  # O(1)
+        T.zero_cell_placeholder = self.zero_cell_placeholder
+        T._set_storage(self._data, self._cols, self._rows,          # O(1)
+                       row_stride=self._col_stride, col_stride=self._row_stride)
+        T._shared = self._shared = True
 
-        return Matrix(m)                   # O(1)
-    
-                                           # Total: O(m) + O(mn) ∈ O(mn)
+        return T                                                    # O(1)
 
     def __add__(self, other: "Matrix") -> "Matrix":
         """
@@ -131,17 +380,26 @@ class Matrix:
         (Note this is not only generalised to square matrices.)
         """
 
-        M_sum = Matrix(self.height(), self.width())     # O(mn) 
-        for y in range(self.height()):                  # O(n)
-            for x in range(self.width()):               # O(m)
-                M_sum[y, x] = self[y, x] + other[y, x]  # O(1) + O(1)
+        if not isinstance(other, Matrix):
+            return NotImplemented           # e.g. a SparseMatrix, which handles the sum itself
 
-        return M_sum                                    # O(1)
-    
-        # Total: T(n) = O(mn) + O(nm) + O(1) ∈ O(mn)
+        if (self.height(), self.width()) != (other.height(), other.width()):
+            raise ValueError(f"Cannot add Matrix[{self.height()} * {self.width()}] and Matrix[{other.height()} * {other.width()}]")
+
+        if self._is_nd() and other._is_nd():
+            return Matrix(self._nd2d() + other._nd2d())
+
+        values = list(map(add, self._flat_list(), other._flat_list()))  # O(mn)
+
+        return Matrix.from_flat(values, self.height(), self.width())    # O(mn)
+
+        # Total: T(n) = O(mn) + O(mn) ∈ O(mn)
         # For square matrices, m = n:
         # Which means the time complexity of addition of square matrices is T(n) ∈ O(n^2).
 
+    def _row_lists(self) -> list[list]:
+        return [self._row_list(y) for y in range(self._rows)]
+
     def __matmul__(self, other: "Matrix") -> "Matrix":
         """
         Multiply with another matrix.
@@ -152,19 +410,145 @@ class Matrix:
         (Note this is not only generalised to square matrices.)
         """
 
-        m = Matrix(self.height(), other.width())    # O(mn)
-        other_T = other.transpose()                 # O(mn)
+        if not isinstance(other, Matrix):
+            return NotImplemented           # e.g. a SparseMatrix, which handles the product itself
+
+        return self.multiply(other)
+
+    def multiply(self, other: "Matrix", strategy: str = "auto") -> "Matrix":
+        """
+        Multiply with another matrix using the given strategy.
+        self:       Matrix[n * k]
+        other:      Matrix[k * m]
+        strategy:   one of MULTIPLY_STRATEGIES, or "auto" to pick one from the dimensions
+        Returns     Matrix[n * m]
+        """
+
+        n, k, m = self.height(), self.width(), other.width()
+        if other.height() != k:
+            raise ValueError(f"Cannot multiply Matrix[{n} * {k}] by Matrix[{other.height()} * {m}]")
+
+        if strategy == "auto":
+            strategy = choose_multiply_strategy(n, k, m, self._is_nd() and other._is_nd())
+        if strategy not in MULTIPLY_STRATEGIES:
+            raise ValueError(f"Unknown multiplication strategy {strategy!r}, expected one of {list(MULTIPLY_STRATEGIES)}")
+
+        if strategy == "numpy":
+            if np is None:
+                raise ValueError("The numpy multiplication strategy requires NumPy")
+            A = self._nd2d() if self._is_nd() else np.array(self._row_lists())
+            B = other._nd2d() if other._is_nd() else np.array(other._row_lists())
+            return Matrix(A @ B)
 
-        for y in range(self.height()):              # O(n)
-            for x in range(other.width()):          # O(m)
-                m[y, x] = dotp(self[y], other_T[x]) # O(dim v) ∈ O(m)
+        if strategy == "naive":
+            other_T = other.transpose()                                         # O(1)
+            columns = other_T._row_lists()                                      # O(km)
+            C = [[dotp(row, column) for column in columns] for row in self._row_lists()]
+        else:
+            C = MULTIPLY_STRATEGIES[strategy](self._row_lists(), other._row_lists())
+
+        return Matrix.from_flat([e for row in C for e in row], n, m)            # O(nm)
+
+        # naive: O(nk) + O(km) + O(nmk) ∈ O(nm^2) for k = m
 
-        return m                                    # O(1)
-    
-        # Total: 2*O(mn) + O(nm^2) + O(1) ∈ O(nm^2)
-        
         # For square matrices, n = m:
         # Therefore, the time complexity of multiplication of square matrices is T(n) ∈ O(n^3)
 
-        # This is the naive approach, by manually computing all of the dot-products of corresponding row vectors of A and column vectors of B.
-        # The standard approach uses Straussen's algorithm, which has an asymptotic time complexity of O(n^2.81).
+        # The naive approach manually computes all of the dot-products of corresponding row vectors of A and column vectors of B.
+        # Straussen's algorithm has an asymptotic time complexity of O(n^2.81), but only pays off above STRASSEN_CUTOFF.
+
+
+# Multiplication kernels on lists of rows, used by Matrix.multiply(...).
+
+BLOCK_SIZE = 64             # Tile edge of the blocked kernel
+STRASSEN_CUTOFF = 128       # Below this edge length, Strassen hands its sub-blocks to the blocked kernel
+
+def multiply_blocked(A: list[list], B: list[list]) -> list[list]:
+    """
+    Cache-tiled multiplication of A[n * k] by B[k * m].
+    B is transposed once, then processed in tiles of BLOCK_SIZE columns: every row of A is multiplied
+    against one tile before moving on, so the tile stays hot in cache while all of A streams past it.
+    Each entry is a single sum(map(mul, ...)), which keeps the inner loop in C.
+    """
+
+    n, m = len(A), len(B[0]) if B else 0
+    B_T = [list(column) for column in zip(*B)]              # O(km)
+    C = [[] for _ in range(n)]
+
+    for j0 in range(0, m, BLOCK_SIZE):                      # O(m / b)
+        tile = B_T[j0:j0 + BLOCK_SIZE]
+        for i in range(n):                                  # O(n)
+            A_row = A[i]
+            C[i].extend([sum(map(mul, A_row, column)) for column in tile])  # O(bk)
+
+    return C                                                # Total: O(nkm)
+
+def _pad(A: list[list], rows: int, cols: int) -> list[list]:
+    # Zero-pads A to rows * cols.
+    padded = [row + [0] * (cols - len(row)) for row in A]
+    padded += [[0] * cols for _ in range(rows - len(A))]
+    return padded
+
+def _quadrants(A: list[list]) -> tuple[list[list], list[list], list[list], list[list]]:
+    h, w = len(A) // 2, len(A[0]) // 2
+    return ([row[:w] for row in A[:h]], [row[w:] for row in A[:h]],
+            [row[:w] for row in A[h:]], [row[w:] for row in A[h:]])
+
+def _add(A: list[list], B: list[list]) -> list[list]:
+    return [list(map(add, a, b)) for a, b in zip(A, B)]
+
+def _sub(A: list[list], B: list[list]) -> list[list]:
+    return [list(map(sub, a, b)) for a, b in zip(A, B)]
+
+def multiply_strassen(A: list[list], B: list[list]) -> list[list]:
+    """
+    Strassen multiplication of A[n * k] by B[k * m], using 7 half-size products instead of 8.
+    Odd dimensions are padded with a zero row/column at each level and the padding is trimmed
+    from the result. Sub-blocks with an edge below STRASSEN_CUTOFF use the blocked kernel.
+    """
+
+    n, k, m = len(A), len(B), len(B[0]) if B else 0
+    if min(n, k, m) <= STRASSEN_CUTOFF:
+        return multiply_blocked(A, B)
+
+    n2, k2, m2 = n + n % 2, k + k % 2, m + m % 2
+    A11, A12, A21, A22 = _quadrants(_pad(A, n2, k2))
+    B11, B12, B21, B22 = _quadrants(_pad(B, k2, m2))
+
+    M1 = multiply_strassen(_add(A11, A22), _add(B11, B22))
+    M2 = multiply_strassen(_add(A21, A22), B11)
+    M3 = multiply_strassen(A11, _sub(B12, B22))
+    M4 = multiply_strassen(A22, _sub(B21, B11))
+    M5 = multiply_strassen(_add(A11, A12), B22)
+    M6 = multiply_strassen(_sub(A21, A11), _add(B11, B12))
+    M7 = multiply_strassen(_sub(A12, A22), _add(B21, B22))
+
+    C11 = _add(_sub(_add(M1, M4), M5), M7)
+    C12 = _add(M3, M5)
+    C21 = _add(M2, M4)
+    C22 = _add(_add(_sub(M1, M2), M3), M6)
+
+    C = [r1 + r2 for r1, r2 in zip(C11, C12)] + [r1 + r2 for r1, r2 in zip(C21, C22)]
+    return [row[:m] for row in C[:n]]                       # Trim the padding
+
+    # T(n) = 7T(n/2) + O(n^2) ∈ O(n^log2(7)) ≈ O(n^2.81)
+
+MULTIPLY_STRATEGIES = {
+    "naive": None,          # Handled in Matrix.multiply(...) with dotp(...)
+    "blocked": multiply_blocked,
+    "strassen": multiply_strassen,
+    "numpy": None,          # Handled in Matrix.multiply(...) with the ndarray @ operator
+}
+
+def choose_multiply_strategy(n: int, k: int, m: int, numeric_arrays: bool = False) -> str:
+    """
+    Picks the multiplication strategy expected to be fastest for Matrix[n * k] @ Matrix[k * m].
+    """
+
+    if numeric_arrays:
+        return "numpy"                      # BLAS beats anything written in Python
+    if n * k * m <= 8 ** 3:
+        return "naive"                      # Too small for tiling to pay for its slicing
+    if min(n, k, m) > 2 * STRASSEN_CUTOFF:
+        return "strassen"                   # Every level saves an eighth of the products
+    return "blocked"
@@ -0,0 +1,147 @@
+"""
+The OrderBatch class
+A day's orders stored column by column, for large batches (e.g. 10,000 incoming orders).
+
+Row r of the count matrix holds order r: its count of each supply (indexed by supply id, see
+supply.SUPPLY_IDS) followed by the id of its town in the network. The net weight and value of every
+order come from a single product of that matrix with the [SUPPLY_WEIGHT | SUPPLY_COST] matrix (whose
+town row is zero), so no SupplyOrder is walked. Totals per town are then one grouped sum, and totals
+per sortie a sum over its rows.
+"""
+
+from array import array
+from typing import Iterable, Iterator
+
+from matrix import Matrix, np
+from supply import SupplyOrder, Supplies, N_SUPPLIES, SUPPLY_BY_ID, SUPPLY_WEIGHT_BY_ID, SUPPLY_COST_BY_ID
+from taxicab_distances import get_network
+
+TOWN_COLUMN = N_SUPPLIES    # Column of the count matrix holding the town id
+
+# [SUPPLY_WEIGHT | SUPPLY_COST] by supply id, with a zero row for the town column.
+_SUPPLY_COEFFICIENTS = [[w, c] for w, c in zip(SUPPLY_WEIGHT_BY_ID, SUPPLY_COST_BY_ID)] + [[0.0, 0.0]]
+
+class OrderBatch:
+    __slots__ = ("_counts", "_rows", "_totals")
+
+    def __init__(self, orders: Iterable[SupplyOrder] = ()):
+        ids = get_network().distances.ids
+
+        flat = array("q")
+        rows = 0
+        for order in orders:                                    # O(n * N_SUPPLIES)
+            flat.extend(order.supplies.counts())
+            flat.append(ids[order.town])
+            rows += 1
+
+        self._set_counts(flat, rows)
+
+    @classmethod
+    def from_counts(cls, counts: list[list[int]], towns: list[str]) -> "OrderBatch":
+        """
+        Builds a batch from rows of supply counts (indexed by supply id) and the town of each row,
+        without making a SupplyOrder for each.
+        """
+
+        ids = get_network().distances.ids
+        flat = array("q")
+        for row, town in zip(counts, towns):
+            flat.extend(row)
+            flat.append(ids[town])
+
+        batch = cls.__new__(cls)
+        batch._set_counts(flat, len(towns))
+        return batch
+
+    def _set_counts(self, flat: array, rows: int):
+        self._rows = rows
+        self._counts = Matrix.from_flat(flat, rows, N_SUPPLIES + 1)
+        self._totals = None
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def _columns(self) -> tuple:
+        """
+        Returns (net weights, net values) of every order, computed once as counts @ coefficients.
+        """
+
+        if self._totals is None:
+            if self._rows == 0:
+                self._totals = ([], [])
+            else:
+                flat = (self._counts @ Matrix(_SUPPLY_COEFFICIENTS))._flat()   # O(n * N_SUPPLIES), row-major pairs
+                self._totals = (flat[0::2], flat[1::2])
+        return self._totals
+
+    def net_weights(self) -> list[float]:
+        weights = self._columns()[0]
+        return weights.tolist() if type(weights) != list else list(weights)
+
+    def net_values(self) -> list[float]:
+        values = self._columns()[1]
+        return values.tolist() if type(values) != list else list(values)
+
+    @property
+    def net_weight(self) -> float:
+        return float(sum(self._columns()[0]))
+
+    @property
+    def net_value(self) -> float:
+        return float(sum(self._columns()[1]))
+
+    def town_ids(self) -> list[int]:
+        town_column = self._counts._flat()[TOWN_COLUMN :: N_SUPPLIES + 1]             # Strided slice, no row walk
+        return town_column.tolist() if type(town_column) != list else town_column
+
+    def totals(self, rows: Iterable[int]) -> tuple[float, float]:
+        """
+        Returns the (net weight, net value) of the given orders, e.g. the orders of one sortie.
+        """
+
+        weights, values = self._columns()
+        rows = list(rows)
+        if np is not None and isinstance(weights, np.ndarray):
+            return float(weights[rows].sum()), float(values[rows].sum())
+        return sum(weights[r] for r in rows), sum(values[r] for r in rows)
+
+    def town_totals(self) -> dict[str, tuple[float, float]]:
+        """
+        Returns {town: (net weight, net value)} over the orders for each town, in one grouped pass.
+        """
+
+        names = get_network().names
+        weights, values = self._columns()
+        towns = self.town_ids()
+
+        if np is not None and isinstance(weights, np.ndarray):
+            towns = np.asarray(towns, dtype=np.int64)
+            town_weights = np.bincount(towns, weights=weights)
+            town_values = np.bincount(towns, weights=values)
+            return {names[t]: (float(town_weights[t]), float(town_values[t])) for t in np.unique(towns).tolist()}
+
+        grouped: dict[int, list[float]] = {}
+        for t, w, v in zip(towns, weights, values):
+            total = grouped.setdefault(t, [0, 0])
+            total[0] += w
+            total[1] += v
+        return {names[t]: (w, v) for t, (w, v) in grouped.items()}
+
+    def rows_at(self, town: str) -> list[int]:
+        t = get_network().distances.ids[town]
+        return [r for r, u in enumerate(self.town_ids()) if u == t]
+
+    def order(self, r: int) -> SupplyOrder:
+        """
+        Returns order r as a SupplyOrder.
+        """
+
+        row = self._counts[r].tolist()
+        supplies = Supplies()
+        for i in range(N_SUPPLIES):
+            if row[i]:
+                supplies.add(SUPPLY_BY_ID[i], row[i])
+        return SupplyOrder(town = get_network().names[row[TOWN_COLUMN]], supplies = supplies)
+
+    def __iter__(self) -> Iterator[SupplyOrder]:
+        return (self.order(r) for r in range(self._rows))
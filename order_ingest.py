@@ -0,0 +1,112 @@
+"""
+Streaming order ingestion
+Reads the day's orders from a JSONL or CSV file (or stdin) one line at a time, checks them, splits any
+order heavier than a plane can carry, and hands them to the planner in chunks of at most CHUNK_SIZE
+orders. Nothing holds more than one chunk, so memory stays flat however long the order file is.
+
+JSONL: one order per line, e.g.
+    {"town": "Broome", "supplies": {"nitrousoxidecanister": 30, "Soap": 4}}
+CSV: a header of "town" and supply names, then one order per row, e.g.
+    town,nitrousoxidecanister,soap
+    Broome,30,4
+
+Supply names are accepted as in SUPPLY_NAMES (e.g. "dialysismachine") or as display names
+(e.g. "Dialysis Machine").
+"""
+
+import csv
+import json
+import sys
+from itertools import islice
+from typing import Iterable, Iterator, TextIO
+
+from taxicab_distances import get_network
+from supply import SupplyOrder, Supplies, SUPPLY_NAMES, SUPPLY_BY_ID, supply_id
+from constants import C2
+from fleet import iter_split
+
+CHUNK_SIZE = 256        # Orders per chunk handed to the planner
+
+def make_order(town: str, supplies: dict, where: str = "") -> SupplyOrder:
+    """
+    Returns the SupplyOrder of {supply: count} for the town, or raises ValueError naming where the
+    order came from if the town or a supply is unknown, or a count is not a whole number >= 0.
+    """
+
+    if town not in get_network().distances.ids:
+        raise ValueError(f"{where}unknown town {town!r}")
+
+    order = Supplies()
+    for name, count in supplies.items():
+        i = supply_id(name)
+        if i is None:
+            raise ValueError(f"{where}unknown supply {name!r}, expected one of {sorted(SUPPLY_NAMES)}")
+        if count is None: continue         # A short CSV row
+        if isinstance(count, str):
+            count = count.strip()
+            if count == "": continue
+            if not count.isdigit():
+                raise ValueError(f"{where}count of {name!r} must be a whole number, got {count!r}")
+            count = int(count)
+        if isinstance(count, bool) or not isinstance(count, int) or count < 0:
+            raise ValueError(f"{where}count of {name!r} must be a whole number, got {count!r}")
+        if count:
+            order.add(SUPPLY_BY_ID[i], count)
+
+    return SupplyOrder(town = town, supplies = order)
+
+def read_jsonl(stream: TextIO, name: str = "<stdin>") -> Iterator[SupplyOrder]:
+    for n, line in enumerate(stream, 1):
+        if not line.strip(): continue
+        where = f"{name}:{n}: "
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{where}{e.msg}") from None
+        if not isinstance(record, dict) or "town" not in record or not isinstance(record.get("supplies"), dict):
+            raise ValueError(f"{where}expected {{\"town\": ..., \"supplies\": {{...}}}}")
+        yield make_order(record["town"], record["supplies"], where)
+
+def read_csv(stream: TextIO, name: str = "<stdin>") -> Iterator[SupplyOrder]:
+    reader = csv.DictReader(stream)
+    if reader.fieldnames is None or "town" not in reader.fieldnames:
+        raise ValueError(f"{name}:1: expected a header with a \"town\" column")
+    for row in reader:
+        town = row.pop("town")
+        if not town: continue
+        if None in row:
+            raise ValueError(f"{name}:{reader.line_num}: more fields than the header")
+        yield make_order(town, row, f"{name}:{reader.line_num}: ")
+
+def read_orders(source: "str | TextIO" = "-", format: str = None) -> Iterator[SupplyOrder]:
+    """
+    Yields the orders in source, a path or "-" for stdin, one line at a time.
+    format: "jsonl" or "csv", by default from the file extension (JSONL for stdin).
+    """
+
+    if format is None:
+        format = "csv" if isinstance(source, str) and source.lower().endswith(".csv") else "jsonl"
+    if format not in ("jsonl", "csv"):
+        raise ValueError(f"Unknown order format {format!r}, expected \"jsonl\" or \"csv\"")
+    read = read_csv if format == "csv" else read_jsonl
+
+    if source == "-":
+        yield from read(sys.stdin)
+    elif isinstance(source, str):
+        with open(source, newline = "") as f:
+            yield from read(f, source)
+    else:
+        yield from read(source, getattr(source, "name", "<stream>"))
+
+def chunked(orders: Iterable[SupplyOrder], size: int = CHUNK_SIZE) -> Iterator[list[SupplyOrder]]:
+    orders = iter(orders)
+    while chunk := list(islice(orders, size)):
+        yield chunk
+
+def ingest(source: "str | TextIO" = "-", format: str = None, capacity: float = C2, chunk_size: int = CHUNK_SIZE) -> Iterator[list[SupplyOrder]]:
+    """
+    The whole pipeline: yields chunks of at most chunk_size orders read from source, with every order
+    heavier than capacity (the largest plane by default) split into pieces that fit.
+    """
+
+    return chunked(iter_split(read_orders(source, format), capacity), chunk_size)
@@ -0,0 +1,102 @@
+"""
+Parallel planning
+Spreads independent planning jobs (routes, order splits and whole what-if scenarios) over a pool of
+worker processes, e.g. for the end-of-day batch of scenarios.
+
+Every worker loads the town network once, when it starts, and keeps it for all of its jobs.
+Results are returned in the order the jobs were given, whatever order the workers finish in.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from os import cpu_count
+
+from taxicab_distances import get_network
+from supply import SupplyOrder
+from constants import MARKET_FUEL_COST_PER_LITRE
+from select_maximum_supplies import select_maximum_of_supplies
+from generate_trip import determine_route, determine_route_exact, improve_route, get_fuel_coefficients
+from fleet import Plane, PLANES, dispatch, report
+
+ROUTE_SOLVERS = {
+    "greedy": determine_route,
+    "exact": determine_route_exact,
+}
+
+class Scenario:
+    """
+    One what-if plan of a day's orders: which planes are available, the fuel price and the route solver.
+    """
+
+    def __init__(self, orders: list[SupplyOrder], planes: list[Plane] = PLANES,
+                 fuel_price: float = MARKET_FUEL_COST_PER_LITRE, route_solver: str = "greedy", name: str = ""):
+        self.orders = orders
+        self.planes = planes
+        self.fuel_price = fuel_price
+        self.route_solver = route_solver
+        self.name = name
+
+def _load_network():
+    # Pool initializer: loads the network and its distances once per worker.
+    network = get_network()
+    network.distances
+    get_fuel_coefficients()
+
+def _route_job(job: dict) -> tuple:
+    solver = ROUTE_SOLVERS[job.pop("solver", "greedy")]
+    job["orders"] = list(job["orders"])         # determine_route(...) pops the orders it serves
+    return improve_route(solver(**job), W0 = job["W0"])
+
+def _split_job(job: tuple[float, SupplyOrder]) -> tuple[SupplyOrder, SupplyOrder]:
+    W, order = job
+    return select_maximum_of_supplies(W, order)
+
+def _scenario_job(scenario: Scenario) -> dict[str, float]:
+    sorties = dispatch(scenario.orders, planes = scenario.planes, route_solver = ROUTE_SOLVERS[scenario.route_solver])
+    totals = report(sorties)
+    totals["fuel cost"] = totals["litres"] * scenario.fuel_price
+    totals["name"] = scenario.name
+    return totals
+
+def _run(function, jobs: list, workers: int | None) -> list:
+    """
+    Returns [function(job) for job in jobs], computed over workers processes (all cores by default).
+    With a single worker, or a single job, everything runs in this process.
+    """
+
+    jobs = list(jobs)
+    workers = min(workers or cpu_count() or 1, len(jobs))
+    if workers <= 1:
+        _load_network()
+        return [function(job) for job in jobs]
+
+    # A few chunks per worker: large enough to amortise pickling, small enough to balance the load.
+    chunksize = max(1, len(jobs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers = workers, initializer = _load_network) as executor:
+        return list(executor.map(function, jobs, chunksize = chunksize))   # map keeps the order of jobs
+
+def plan_routes(jobs: list[dict], workers: int = None) -> list[tuple]:
+    """
+    jobs: keyword arguments of determine_route(...) for each route (F, W0, source, orders),
+          with an optional "solver" of "greedy" or "exact"
+
+    Returns the improved route of each job (see improve_route(...)), in the order of jobs.
+    """
+
+    return _run(_route_job, [dict(job) for job in jobs], workers)
+
+def split_orders(jobs: list[tuple[float, SupplyOrder]], workers: int = None) -> list[tuple[SupplyOrder, SupplyOrder]]:
+    """
+    jobs: (W, order) pairs for select_maximum_of_supplies(...)
+
+    Returns the (new, remaining) pair of each job, in the order of jobs.
+    """
+
+    return _run(_split_job, jobs, workers)
+
+def plan_scenarios(scenarios: list[Scenario], workers: int = None) -> list[dict[str, float]]:
+    """
+    Returns the report(...) totals of dispatching each scenario, with its fuel cost at the scenario's
+    fuel price and its name, in the order of scenarios.
+    """
+
+    return _run(_scenario_job, scenarios, workers)
@@ -3,44 +3,154 @@
 For U3O3 SAT. Part1.
 To settle the assumption that orders can contain supplie quantities greater than the carry capacity of either plane.
 
+The alternation of determine_planes(...) is computed in closed form: while more than C2 is left, the
+planes go small, large, small, large, ..., each pair carrying C1 + C2, and at most one more plane
+finishes the order. So a sequence is stored as run-length counts of that pair rather than plane by
+plane, and plane_counts(...) sizes a whole array of order weights at once.
+
 """
 
-from constants import SMALLER_PLANE, LARGER_PLANE, C1, C2
+from fractions import Fraction
+from math import ceil
+
+from constants import SMALLER_PLANE, LARGER_PLANE, C1, C2, EMPTY_WEIGHT_1, EMPTY_WEIGHT_2
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+PAIR = (SMALLER_PLANE, LARGER_PLANE)
+
+def _pairs_and_tail(net_weight: float) -> tuple[int, str | None]:
+    # Number of (small, large) pairs, and the plane finishing the order (None if the pairs suffice).
+    pairs = max(0, ceil((net_weight - C2) / (C1 + C2)))
+    remaining_weight = net_weight - pairs * (C1 + C2)
+    if remaining_weight <= 0:
+        return pairs, None
+    return pairs, SMALLER_PLANE if remaining_weight <= C1 else LARGER_PLANE
+
+def plane_runs(net_weight: float) -> list[tuple[tuple[str, ...], int]]:
+    """
+    Returns the plane sequence of determine_planes(net_weight) as run-length counts,
+    e.g. [((SMALLER_PLANE, LARGER_PLANE), 2), ((SMALLER_PLANE,), 1)] for S, L, S, L, S.
+    O(1) whatever the weight.
+    """
+
+    pairs, tail = _pairs_and_tail(net_weight)
+    runs = []
+    if pairs: runs.append((PAIR, pairs))
+    if tail: runs.append(((tail,), 1))
+    return runs
+
+def plane_counts(weights):
+    """
+    weights: an order weight in kg, or a list/array of them
+
+    Returns (small, large): the number of each plane in the sequence of determine_planes(...) for each
+    weight, as ints for a single weight, otherwise as lists (or ndarrays when NumPy is available).
+    """
+
+    if isinstance(weights, (int, float)):
+        pairs, tail = _pairs_and_tail(weights)
+        return pairs + (tail == SMALLER_PLANE), pairs + (tail == LARGER_PLANE)
+
+    if np is not None:
+        W = np.asarray(weights, dtype=np.float64)
+        pairs = np.maximum(0, np.ceil((W - C2) / (C1 + C2))).astype(np.int64)
+        remaining_weight = W - pairs * (C1 + C2)
+        small = pairs + ((remaining_weight > 0) & (remaining_weight <= C1))
+        large = pairs + (remaining_weight > C1)
+        return small, large
+
+    counts = [plane_counts(float(W)) for W in weights]
+    return [s for s, _ in counts], [l for _, l in counts]
+
+def optimal_fleet_mix(weights, objective: str = "fuel"):
+    """
+    weights: an order weight in kg, or a list/array of them
+    objective: "fuel" for the least empty weight flown (the fuel burnt over the same trips grows with it),
+               then the fewest sorties; or "sorties" for the fewest sorties, then the least fuel
+
+    Returns (small, large): the number of each plane carrying each weight, in the same form as plane_counts(...).
+    Unlike determine_planes(...), the planes need not alternate.
 
-def determine_planes ( net_weight ):
+    q large planes carry exactly what p small ones do (q * C2 = p * C1), so some optimal mix has fewer
+    than p small planes, or fewer than q large ones when small planes burn less fuel for the same
+    capacity. Only those few mixes are compared.
+    """
+
+    if objective not in ("fuel", "sorties"):
+        raise ValueError(f"Unknown objective {objective!r}, expected \"fuel\" or \"sorties\"")
+
+    ratio = Fraction(C2 / C1).limit_denominator(1000)
+    p, q = ratio.numerator, ratio.denominator
+    enumerate_large = objective == "fuel" and p * EMPTY_WEIGHT_1 < q * EMPTY_WEIGHT_2
+
+    single = isinstance(weights, (int, float))
+    W = [float(weights)] if single else weights
+
+    if np is not None:
+        W = np.asarray(W, dtype=np.float64)[:, None]
+        fixed = np.arange(q if enumerate_large else p)[None, :]
+        if enumerate_large:
+            large = np.broadcast_to(fixed, (W.shape[0], q))
+            small = np.ceil(np.maximum(0, W - large * C2) / C1).astype(np.int64)
+        else:
+            small = np.broadcast_to(fixed, (W.shape[0], p))
+            large = np.ceil(np.maximum(0, W - small * C1) / C2).astype(np.int64)
+
+        fuel = small * EMPTY_WEIGHT_1 + large * EMPTY_WEIGHT_2
+        sorties = small + large
+        # Lexicographic (primary, secondary): the least secondary among the mixes with the least primary.
+        primary, secondary = (fuel, sorties) if objective == "fuel" else (sorties, fuel)
+        masked = np.where(primary == primary.min(axis=1, keepdims=True), secondary, np.inf)
+        choice = masked.argmin(axis=1)[:, None]
+        small = np.take_along_axis(small, choice, axis=1)[:, 0]
+        large = np.take_along_axis(large, choice, axis=1)[:, 0]
+        if single:
+            return int(small[0]), int(large[0])
+        return small, large
+
+    mixes = []
+    for w in W:
+        options = []
+        for k in range(q if enumerate_large else p):
+            if enumerate_large:
+                s, l = ceil(max(0, w - k * C2) / C1), k
+            else:
+                s, l = k, ceil(max(0, w - k * C1) / C2)
+            fuel, sorties = s * EMPTY_WEIGHT_1 + l * EMPTY_WEIGHT_2, s + l
+            options.append(((fuel, sorties) if objective == "fuel" else (sorties, fuel), k, s, l))
+        _, _, s, l = min(options)
+        mixes.append((s, l))
+
+    if single:
+        return mixes[0]
+    return [s for s, _ in mixes], [l for _, l in mixes]
+
+def determine_planes ( net_weight, verbose = False ):
     # Alternate planes to simultaneously complete orders.
     # Only use larger plane if remaining weight is in [C2, 2 * C1]
 
-    print(f"Sequence for {net_weight} kg order")
-    
-    remaining_weight = net_weight
-    
+    if verbose:
+        print(f"Sequence for {net_weight} kg order")
+
     plane_sequence = [] # (Zero-Indexed)
-    num_planes = 0
-    previous_plane = None
-    
-    while remaining_weight > 0:
-        
-        if (remaining_weight <= C1 or remaining_weight > C2) and previous_plane != SMALLER_PLANE:
-            plane_sequence.append( SMALLER_PLANE )
-            remaining_weight -= C1
-            previous_plane = SMALLER_PLANE
-            
-        else:
-            plane_sequence.append( LARGER_PLANE )
-            remaining_weight -= C2
-            previous_plane = LARGER_PLANE
-
-        num_planes += 1
-    
-    print("Fleet Total Carry Capacity:", net_weight - remaining_weight)
-      
+    for pattern, count in plane_runs(net_weight):
+        plane_sequence.extend(pattern * count)
+
+    if verbose:
+        pairs, tail = _pairs_and_tail(net_weight)
+        remaining_weight = net_weight - pairs * (C1 + C2) - {None: 0, SMALLER_PLANE: C1, LARGER_PLANE: C2}[tail]
+        print("Fleet Total Carry Capacity:", net_weight - remaining_weight)
+
     return plane_sequence
-    
+
 if __name__ == "__main__":
     print()
 
-    print( determine_planes(6000.0), "\n")
-    print( determine_planes(5600.0), "\n" )
-    print( determine_planes(5500.0), "\n" )
-    print( determine_planes(5400.0), "\n" )
\ No newline at end of file
+    print( determine_planes(6000.0, verbose = True), "\n")
+    print( determine_planes(5600.0, verbose = True), "\n" )
+    print( determine_planes(5500.0, verbose = True), "\n" )
+    print( determine_planes(5400.0, verbose = True), "\n" )
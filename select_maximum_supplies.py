@@ -3,13 +3,457 @@
 DP approach to select supplies from a given order to fit under the max full fuel payload of a given plane.
 This is an upgrade from the previous deprecated version.
 
+The default engine is an iterative bounded knapsack over integer grams. Item counts are binary split
+(1, 2, 4, ..., rest) so an order of 70,000 masks becomes 17 pieces rather than 70,000 choices, and the
+table is a single flat array of the best value (in cents) for each capacity, updated a whole slice at a
+time (with NumPy when available, otherwise with the array module). For each piece, a bitmap records
+the capacities where taking it was better, which is all that is needed to rebuild the selection.
+
 """
 
+from array import array
+from collections import OrderedDict
+from itertools import repeat
+from math import gcd
+from operator import add, gt, lt
 
 from supply import SupplyOrder, Supplies, SUPPLY_WEIGHT, SUPPLY_COST
+from constants import C2, PLANE_CAPACITY
+from plane_sequencer import determine_planes
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+GRAMS_PER_KG = 1000
+CENTS_PER_DOLLAR = 100
+
+# Maps the 0/1 bytes produced by operator.gt onto the ASCII digits accepted by int(..., 2).
+_BIT_DIGITS = bytes.maketrans(b"\x00\x01", b"01")
+
+class SolutionCache:
+    """
+    Bounded LRU cache of knapsack solutions, keyed by the capacity in grams and the order's supply counts.
+    Standard order templates are split many times a day, so a repeat split only costs a dictionary lookup.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._solutions: OrderedDict[tuple, tuple[int, ...]] = OrderedDict()
+
+    @staticmethod
+    def fingerprint(capacity: int, names: list[str], counts: list[int]) -> tuple:
+        # Sorted by supply name so the insertion order of the order's supplies does not matter.
+        return (capacity, tuple(sorted(zip(names, counts))))
+
+    def get(self, key: tuple) -> tuple[int, ...] | None:
+        if key not in self._solutions:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._solutions.move_to_end(key)
+        return self._solutions[key]
+
+    def put(self, key: tuple, selected: tuple[int, ...]):
+        self._solutions[key] = selected
+        self._solutions.move_to_end(key)
+        while len(self._solutions) > self.maxsize:
+            self._solutions.popitem(last=False)     # Evict the least recently used solution
+
+    def clear(self):
+        self._solutions.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._solutions), "maxsize": self.maxsize}
+
+    def __len__(self) -> int:
+        return len(self._solutions)
+
+solution_cache = SolutionCache()
+
+def _binary_split(count: int) -> list[int]:
+    """
+    Splits a count into powers of two plus a remainder, e.g. 13 -> [1, 2, 4, 6].
+    Every number in [0, count] is the sum of a subset of the pieces.
+    """
+
+    pieces = []
+    k = 1
+    while count > 0:
+        take = min(k, count)
+        pieces.append(take)
+        count -= take
+        k <<= 1
+    return pieces                                   # O(log count) pieces
+
+def _bit(bitmap, j: int) -> int:
+    # Bit j of a choice bitmap: an int, or a little-endian packed uint8 ndarray.
+    if type(bitmap) is int:
+        return (bitmap >> j) & 1
+    return (int(bitmap[j >> 3]) >> (j & 7)) & 1
+
+def _bounded_knapsack(capacities: list[int], weights: list[int], values: list[int], counts: list[int]) -> list[list[int]]:
+    """
+    capacities: capacities in integer units
+    weights:    weight of one unit of each item in integer units (> 0)
+    values:     value of one unit of each item in integer units
+    counts:     number of units available of each item
+
+    Returns, for each capacity, the number of units to take of each item, maximising total value under that capacity.
+    The table is only built once, up to the largest capacity, as it already holds the optimum for every smaller one.
+    """
+
+    capacity = max(capacities)
+
+    # Lightest pieces first, so the table only grows as far as the weight seen so far can reach.
+    pieces = []
+    for i in range(len(weights)):
+        max_count = min(counts[i], capacity // weights[i])
+        for k in _binary_split(max_count):
+            pieces.append((k * weights[i], k * values[i], i, k))
+    pieces.sort()
+
+    if np is not None:
+        dp = np.zeros(capacity + 1, dtype=np.int64)     # dp[c]: best value with capacity c
+    else:
+        dp = array("q", [0])
+    reach = 1                                           # dp[:reach] is filled in
+    choices: list[tuple[int, int, int, int, object]] = []  # (piece weight, item index, multiplier, table limit, bitmap)
+
+    for w, v, i, k in pieces:
+        # Beyond the reach of the pieces so far every piece is taken, so the table is flat past its end.
+        limit = min(capacity, reach - 1 + w)
+
+        # 0/1 step for the piece, evaluated for every capacity c >= w at once:
+        # dp[c] = max(dp[c], dp[c - w] + v)
+        if np is not None:
+            dp[reach:limit + 1] = dp[reach - 1]
+            take = dp[:limit + 1 - w] + v
+            skip = dp[w:limit + 1]
+            taken = take > skip
+            np.maximum(skip, take, out=skip)            # O(capacity) in C, writes dp[w:] in place
+            # Bit c - w of the packed bitmap is set if the piece was taken at capacity c.
+            bitmap = np.packbits(taken, bitorder="little")
+        else:
+            dp.extend(repeat(dp[-1], limit + 1 - len(dp)))
+            skip = dp[w:]
+            take = array("q", map(add, dp[:limit + 1 - w], repeat(v)))
+            taken = bytes(map(gt, take, skip))
+            dp[w:] = array("q", map(max, skip, take))
+            bitmap = int(taken.translate(_BIT_DIGITS)[::-1] or b"0", 2)
+        reach = limit + 1
+        choices.append((w, i, k, limit, bitmap))
+
+    # Walk the pieces backwards from each capacity to recover its selection.
+    selections = []
+    for c in capacities:
+        selected = [0] * len(weights)
+        for w, i, k, limit, bitmap in reversed(choices):
+            c = min(c, limit)
+            if c >= w and _bit(bitmap, c - w):
+                selected[i] += k
+                c -= w
+        selections.append(selected)
 
-def select_maximum_of_supplies(W: float, order: SupplyOrder):
+    return selections
+
+def _split_order(order: SupplyOrder, names: list[str], selected: list[int]) -> tuple[SupplyOrder, SupplyOrder]:
+    new_order = order.copy()
+    new_order.supplies = Supplies()
+    remaining_order = order.copy()
+    for name, count in zip(names, selected):
+        if count == 0: continue
+        new_order.supplies.add(name, count)
+        remaining_order.supplies.remove(name, count)
+
+    return new_order, remaining_order
+
+def select_maximum_of_supplies_for_capacities(Ws: list[float], order: SupplyOrder, use_cache: bool = True) -> list[tuple[SupplyOrder, SupplyOrder]]:
+    """
+    Ws: maximum capacities/weights in kg, e.g. [C1, C2]
+    order: {supplies: count}
+    use_cache: look up and store the solutions in solution_cache
+
+    Returns a (new_order, remaining_order) pair for each capacity, in the same order as Ws.
+    Capacities that are not cached are answered together from a single table.
+    """
+
+    supplies = order.dict()
+
+    names = [name for name in supplies if supplies[name] > 0]
+    counts = [supplies[name] for name in names]
+    weights = [round(SUPPLY_WEIGHT[name] * GRAMS_PER_KG) for name in names]
+    values = [round(SUPPLY_COST[name] * CENTS_PER_DOLLAR) for name in names]
+
+    capacities = [round(W * GRAMS_PER_KG) for W in Ws]
+    total = sum(w * c for w, c in zip(weights, counts))
+
+    # The fingerprint is sorted by supply name, so the cached counts are stored in that order too.
+    order_by_name = sorted(range(len(names)), key=lambda i: names[i])
+
+    selections: list[list[int]] = [counts] * len(Ws)
+    unsolved: list[int] = []    # Indices of Ws still needing the knapsack
+    for j, capacity in enumerate(capacities):
+        if total <= capacity: continue
+
+        cached = solution_cache.get(SolutionCache.fingerprint(capacity, names, counts)) if use_cache else None
+        if cached is None:
+            unsolved.append(j)
+            continue
+
+        selected = [0] * len(names)
+        for i, count in zip(order_by_name, cached):
+            selected[i] = count
+        selections[j] = selected
+
+    if unsolved:
+        # Work in multiples of the common divisor of the weights so the table is as short as possible,
+        # e.g. an order of dialysis machines and scalpels only needs a slot every 100 g.
+        unit = 0
+        for w in weights:
+            unit = gcd(unit, w)
+
+        solved = _bounded_knapsack([capacities[j] // unit for j in unsolved], [w // unit for w in weights], values, counts)
+        for j, selected in zip(unsolved, solved):
+            selections[j] = selected
+            if use_cache:
+                key = SolutionCache.fingerprint(capacities[j], names, counts)
+                solution_cache.put(key, tuple(selected[i] for i in order_by_name))
+
+    return [_split_order(order, names, selected) for selected in selections]
+
+def select_maximum_of_supplies(W: float, order: SupplyOrder, use_cache: bool = True):
     """
+    W: maximum capcity/weight in kg
+    order: {supplies: count}
+    use_cache: look up and store the solution in solution_cache
+
+    Returns the SupplyOrder ADT of SupplyOrder{town = "...", supplies = selected_count}
+    along with the SupplyOrder of the supplies left behind.
+    """
+
+    return select_maximum_of_supplies_for_capacities([W], order, use_cache)[0]
+
+def _greedy_by_ratio(capacity: int, weights: list[int], values: list[int], counts: list[int]) -> tuple[list[int], float]:
+    """
+    Takes as many units as fit of each item, in order of value per unit weight.
+
+    Returns the selected counts and the LP relaxation bound, i.e. the value reached if a fraction of
+    the first item that does not fully fit could also be taken. No integer selection can beat that bound.
+    """
+
+    ratio_order = sorted(range(len(weights)), key=lambda i: values[i] / weights[i], reverse=True)
+
+    selected = [0] * len(weights)
+    remaining = capacity
+    lp_bound = 0.0
+    critical_seen = False       # Whether the LP relaxation has already taken its fractional item
+
+    for i in ratio_order:                                       # O(number of supply types)
+        take = min(counts[i], remaining // weights[i])
+        selected[i] = take
+
+        if not critical_seen:
+            if take == counts[i]:
+                lp_bound += take * values[i]
+            else:
+                lp_bound += remaining / weights[i] * values[i]
+                critical_seen = True
+
+        remaining -= take * weights[i]
+
+    return selected, lp_bound
+
+def _scaled_knapsack(capacity: int, weights: list[int], values: list[int], counts: list[int], K: float, max_profit: int) -> list[int]:
+    """
+    FPTAS step: rounds each value down to a multiple of K and finds, for every scaled profit up to
+    max_profit, the minimum weight reaching it. Each selected piece loses less than K of value.
+
+    Returns the number of units to take of each item.
+    """
+
+    pieces = []
+    for i in range(len(weights)):
+        max_count = min(counts[i], capacity // weights[i])
+        for k in _binary_split(max_count):
+            p = int(k * values[i] / K)
+            if p == 0: continue
+            pieces.append((min(p, max_profit + 1), k * weights[i], i, k))
+
+    INF = capacity + 1
+    dp = array("q", [0]) + array("q", [INF]) * (max_profit + 1)     # dp[q]: min weight with scaled profit q
+    choices: list[tuple[int, int, int, int]] = []                   # (scaled profit, item index, multiplier, bitmap)
+
+    for p, w, i, k in pieces:
+        if p > max_profit: continue
+
+        # dp[q] = min(dp[q], dp[q - p] + w), evaluated for every q >= p at once
+        skip = dp[p:]
+        take = array("q", map(add, dp[:len(dp) - p], repeat(w)))
+        taken = bytes(map(lt, take, skip))
+        dp[p:] = array("q", [b if b < a else a for a, b in zip(skip, take)])
+
+        bitmap = int(taken.translate(_BIT_DIGITS)[::-1] or b"0", 2)
+        choices.append((p, i, k, bitmap))
+
+    q = max(q for q in range(len(dp)) if dp[q] <= capacity)
+
+    selected = [0] * len(weights)
+    for p, i, k, bitmap in reversed(choices):
+        if q >= p and (bitmap >> (q - p)) & 1:
+            selected[i] += k
+            q -= p
+
+    return selected
+
+def select_approximate_maximum_of_supplies(W: float, order: SupplyOrder, epsilon: float = 0.01) -> tuple[SupplyOrder, SupplyOrder, float]:
+    """
+    Approximate version of select_maximum_of_supplies(...) for orders with very large unit counts.
+
+    W: maximum capcity/weight in kg
+    order: {supplies: count}
+    epsilon: accepted fraction of value lost against the optimum, e.g. 0.01 for 1%
+
+    Returns (new_order, remaining_order, bound), where bound is the selected value over the LP relaxation bound.
+    A ratio-sorted greedy is tried first, which only costs O(number of supply types). If it is not within
+    epsilon of the LP bound, a value-scaled FPTAS over the binary split counts is used instead, whose table
+    is sized by the number of pieces and epsilon rather than by the unit counts or the capacity.
+    """
+
+    supplies = order.dict()
+
+    names = [name for name in supplies if supplies[name] > 0]
+    counts = [supplies[name] for name in names]
+    weights = [round(SUPPLY_WEIGHT[name] * GRAMS_PER_KG) for name in names]
+    values = [round(SUPPLY_COST[name] * CENTS_PER_DOLLAR) for name in names]
+
+    capacity = round(W * GRAMS_PER_KG)
+
+    selected, lp_bound = _greedy_by_ratio(capacity, weights, values, counts)
+    value = sum(v * c for v, c in zip(values, selected))
+
+    # Fix-up: the greedy can be stranded by one valuable item that is heavier than the space left after
+    # the lighter high-ratio items, so also consider filling the plane with the single best item type.
+    for i in range(len(names)):
+        take = min(counts[i], capacity // weights[i])
+        if take * values[i] > value:
+            selected = [0] * len(names)
+            selected[i] = take
+            value = take * values[i]
+
+    # With value 0 no unit fits the capacity (or none is worth anything), so there is nothing to scale
+    # and nothing is selected, as with select_maximum_of_supplies(...).
+    if 0 < value < (1 - epsilon) * lp_bound:
+        # value is at least half the optimum, so rounding to K loses at most epsilon of the optimum in total.
+        piece_count = sum(len(_binary_split(min(c, capacity // w))) for w, c in zip(weights, counts))
+        K = epsilon * value / piece_count
+        selected = _scaled_knapsack(capacity, weights, values, counts, K, int(lp_bound / K))
+        value = sum(v * c for v, c in zip(values, selected))
+
+    bound = value / lp_bound if lp_bound > 0 else 1.0
+    new_order, remaining_order = _split_order(order, names, selected)
+
+    return new_order, remaining_order, bound
+
+def _water_fill(levels: list[int], caps: list[int], count: int, unit_value: int) -> list[int]:
+    """
+    Returns how many of count units (worth unit_value each) to add to each bin, at most caps[b] to bin b,
+    so that the highest value level reached is as low as possible. Fewer than count units are placed
+    only if the bins cannot hold them all.
+    """
+
+    if sum(caps) <= count:
+        return caps[:]
+
+    def placed(L: int) -> list[int]:
+        # Units bin b takes to rise to level L
+        return [min(cap, max(0, (L - level) // unit_value)) for level, cap in zip(levels, caps)]
+
+    low, high = min(levels), max(levels) + count * unit_value   # sum(placed(high)) >= count
+    while low < high:                                           # O(bins * log(count * unit_value))
+        mid = (low + high) // 2
+        if sum(placed(mid)) >= count:
+            high = mid
+        else:
+            low = mid + 1
+
+    # Below level low fewer than count units fit, so top up the bins that reach low with one more unit each.
+    below = placed(low - 1)
+    at = placed(low)
+    extra = count - sum(below)
+    for b in range(len(below)):
+        if extra == 0: break
+        if at[b] > below[b]:
+            below[b] += 1
+            extra -= 1
+    return below
+
+def split_order_into_loads(order: SupplyOrder, capacities: list[float] = None, extra_capacity: float = C2) -> list[SupplyOrder]:
+    """
+    order: {supplies: count}, e.g. many times heavier than a plane
+    capacities: capacity in kg of each load, by default of each plane in determine_planes(order.net_weight)
+    extra_capacity: capacity in kg of any further load, if the supplies do not pack into capacities
+
+    Returns the order partitioned into loads in one pass, as a SupplyOrder for each load in the order of
+    capacities. The heaviest supplies are placed first, and each supply's units are spread over the loads
+    that have room so as to even out the value of the loads.
+    """
+
+    if capacities is None:
+        capacities = [PLANE_CAPACITY[plane] for plane in determine_planes(order.net_weight, verbose = False)]
+
+    supplies = order.dict()
+    names = [name for name in supplies if supplies[name] > 0]
+    counts = [supplies[name] for name in names]
+    weights = [round(SUPPLY_WEIGHT[name] * GRAMS_PER_KG) for name in names]
+    values = [round(SUPPLY_COST[name] * CENTS_PER_DOLLAR) for name in names]
+
+    extra = round(extra_capacity * GRAMS_PER_KG)
+    for name, w in zip(names, weights):
+        if w > extra:
+            raise ValueError(f"A single {name} ({w / GRAMS_PER_KG} kg) is heavier than a load of {extra_capacity} kg")
+
+    room = [round(C * GRAMS_PER_KG) for C in capacities]  # Grams left in each load
+    load_values = [0] * len(room)                       # Cents in each load
+    loads = [[0] * len(names) for _ in room]            # Units of each supply in each load
+
+    for i in sorted(range(len(names)), key = lambda i: weights[i], reverse = True):
+        count = counts[i]
+        while count > 0:
+            added = _water_fill(load_values, [r // weights[i] for r in room], count, max(values[i], 1))
+            for b, k in enumerate(added):
+                if k == 0: continue
+                loads[b][i] += k
+                room[b] -= k * weights[i]
+                load_values[b] += k * values[i]
+            count -= sum(added)
+
+            if count > 0:                               # Every load is full: open another one
+                room.append(extra)
+                load_values.append(0)
+                loads.append([0] * len(names))
+
+    pieces = []
+    for selected in loads:
+        if not any(selected): continue
+        piece = order.copy()
+        piece.supplies = Supplies()
+        for name, k in zip(names, selected):
+            if k: piece.supplies.add(name, k)
+        pieces.append(piece)
+
+    return pieces
+
+def select_maximum_of_supplies_dfs(W: float, order: SupplyOrder):
+    """
+    Recursive reference implementation of select_maximum_of_supplies(...).
+    Only suitable for small orders, as it tries every count of every supply.
+
     W: maximum capcity/weight in kg
     order: {supplies: count}
 
@@ -24,43 +468,40 @@ def select_maximum_of_supplies(W: float, order: SupplyOrder):
     values = [SUPPLY_COST[supply] for supply in names]
     n = len(weights)
 
-    def dfs(capacity: float, idx: int, selected: Supplies, memo: dict = {}):
+    # Scoped to this call, so a second order never sees the first order's results.
+    memo: dict[tuple, tuple[float, dict]] = {}
+
+    def dfs(capacity: float, idx: int) -> tuple[float, dict]:
         # Use a tuple for memoization key (capacity and idx)
         # Round function to avoid floating point precision issues in key
+        # The result only describes supplies idx..n-1, so it is valid for any path reaching this key.
         key = (round(capacity, 6), idx) 
         if key in memo:
             return memo[key]
         if idx == n or capacity <= 0:
-            return (0.0, selected.copy())
+            return (0.0, {})
         
         # Option 1: Skip current item
-        max_val, best_selected = dfs(capacity, idx + 1, selected)
+        max_val, best_selected = dfs(capacity, idx + 1)
 
         # Option 2: Try to take 1 to counts[idx] of current item
         max_take = min(counts[idx], int(capacity / weights[idx])) if weights[idx] > 0 else 0
         for k in range(1, max_take + 1):
             rem_cap = capacity - k * weights[idx]
             if rem_cap >= 0:
-                new = selected.copy()
-                name = "".join(names[idx].lower().split())
-                if names[idx] in new:
-                    new[name] += k
-                else:
-                    new[name] = k
-                val, sel = dfs(rem_cap, idx + 1, new)
+                val, sel = dfs(rem_cap, idx + 1)
                 if val + k * values[idx] > max_val:
                     max_val = val + k * values[idx]
-                    best_selected = sel.copy()
+                    best_selected = {**sel, names[idx]: k}
 
         memo[key] = (max_val, best_selected)
         return (max_val, best_selected)
 
-    max_value, selected_names = dfs(W, 0, {})
+    max_value, selected_names = dfs(W, 0)
 
     remaining_order = order.copy()
     new_order = order.copy()
-    new_order.supplies._supplies.clear()
-    new_order.supplies.net_weight = 0
+    new_order.supplies = Supplies()
     for supply in selected_names:
         count = selected_names[supply]
         new_order.supplies.add(supply, count)
@@ -78,4 +519,4 @@ if __name__ == "__main__":
     print("New Order:", new.supplies)
     print("Remaining Order:", remaining.supplies)
     print(order.net_weight, new.net_weight)
-    print(order.net_weight, remaining.net_weight)
\ No newline at end of file
+    print(order.net_weight, remaining.net_weight)
@@ -0,0 +1,200 @@
+"""
+The SparseMatrix class
+For mostly-empty matrices such as the map grid, where only the cells holding a town are non-zero.
+
+Entries are built up in a dictionary of keys {(i, j): value}, so memory is proportional to the number
+of non-zero entries rather than to the size of the grid. Multiplication converts to CSR (compressed
+sparse rows) first. The interface follows Matrix: indexing, +, @, transpose() and printing with
+zero_cell_placeholder.
+"""
+
+from matrix import Matrix, MatrixRow
+
+class SparseMatrix:
+    __slots__ = ("zero_cell_placeholder", "_rows", "_cols", "_entries", "_csr")
+
+    def __init__(self, rows: int, cols: int, entries: dict[tuple[int, int], float] = None):
+        self.zero_cell_placeholder: str = "0"
+        self._rows = rows
+        self._cols = cols
+        self._entries: dict[tuple[int, int], float] = {}
+        self._csr = None                    # Cached (indptr, indices, values), cleared on every write
+
+        if entries is not None:
+            for (i, j), value in entries.items():
+                self[i, j] = value
+
+    @classmethod
+    def from_dense(cls, M: Matrix) -> "SparseMatrix":
+        S = cls(M.height(), M.width())
+        for i in range(M.height()):
+            for j, e in enumerate(M[i]):
+                if e != 0:
+                    S._entries[i, j] = e
+        S.zero_cell_placeholder = M.zero_cell_placeholder
+        return S
+
+    def to_dense(self) -> Matrix:
+        M = Matrix(self._rows, self._cols)
+        M.zero_cell_placeholder = self.zero_cell_placeholder
+        for (i, j), e in self._entries.items():
+            M[i, j] = e
+        return M
+
+    def _index(self, i: int, j: int) -> tuple[int, int]:
+        if i < 0: i += self._rows
+        if j < 0: j += self._cols
+        if not (0 <= i < self._rows and 0 <= j < self._cols):
+            raise IndexError(f"SparseMatrix index {(i, j)} out of range")
+        return i, j
+
+    def _row_list(self, i: int) -> list:
+        if i < 0: i += self._rows
+        indptr, indices, values = self.csr()
+        row = [0] * self._cols
+        for p in range(indptr[i], indptr[i + 1]):
+            row[indices[p]] = values[p]
+        return row
+
+    def csr(self) -> tuple[list[int], list[int], list]:
+        """
+        Returns the entries in compressed sparse row form (indptr, indices, values):
+        the entries of row i are values[indptr[i]:indptr[i + 1]], in the columns indices[indptr[i]:indptr[i + 1]].
+        """
+
+        if self._csr is not None:
+            return self._csr
+
+        indptr = [0] * (self._rows + 1)
+        for i, _ in self._entries:                          # O(nnz)
+            indptr[i + 1] += 1
+        for i in range(self._rows):                         # O(n)
+            indptr[i + 1] += indptr[i]
+
+        indices, values = [], []
+        for (i, j) in sorted(self._entries):                # O(nnz log nnz)
+            indices.append(j)
+            values.append(self._entries[i, j])
+
+        self._csr = (indptr, indices, values)
+        return self._csr
+
+    def nnz(self) -> int:
+        return len(self._entries)
+
+    def items(self):
+        return self._entries.items()
+
+    @property
+    def arr(self) -> list[MatrixRow]:
+        return [MatrixRow(self, i) for i in range(self._rows)]
+
+    def __getitem__(self, *pair: tuple) -> float:
+        if len(pair) == 1 and type(pair[0]) == tuple:
+            pair = pair[0]
+        if len(pair) == 2:
+            return self._entries.get(self._index(*pair), 0)
+        return MatrixRow(self, pair[0])
+    def __setitem__(self, pair: tuple, value: float):
+        key = self._index(*pair)
+        self._csr = None
+        if value == 0:                      # Zeros are never stored
+            self._entries.pop(key, None)
+            return
+        self._entries[key] = value
+    def width(self) -> int:
+        return self._cols
+    def height(self) -> int:
+        return self._rows
+
+    # Printing walks every cell like Matrix does, filling the empty ones with zero_cell_placeholder.
+    _column_widths = Matrix._column_widths
+    render = Matrix.render
+    __str__ = Matrix.__str__
+    def __repr__(self) -> str:
+        return str(self)
+
+    def transpose(self) -> "SparseMatrix":
+        """
+        Compute the transpose of the matrix.
+        self: SparseMatrix[n * m]
+        Returns: SparseMatrix[m * n]
+        """
+
+        T = SparseMatrix(self._cols, self._rows)
+        T.zero_cell_placeholder = self.zero_cell_placeholder
+        T._entries = {(j, i): e for (i, j), e in self._entries.items()}    # O(nnz)
+        return T
+
+    def __add__(self, other: "SparseMatrix | Matrix") -> "SparseMatrix | Matrix":
+        """
+        Sum with another matrix.
+        self:       SparseMatrix[n * m]
+        other:      SparseMatrix[n * m] or Matrix[n * m]
+        Returns     SparseMatrix[n * m], or Matrix[n * m] if other is dense
+        """
+
+        if not isinstance(other, SparseMatrix):
+            M = other + Matrix(self._rows, self._cols)      # Dense copy of other
+            for (i, j), e in self._entries.items():         # O(nnz)
+                M[i, j] = e + M[i, j]
+            return M
+
+        S = SparseMatrix(self._rows, self._cols)
+        S._entries = dict(self._entries)                    # O(nnz)
+        for key, e in other._entries.items():               # O(nnz)
+            total = S._entries.get(key, 0) + e
+            if total == 0:
+                S._entries.pop(key, None)
+            else:
+                S._entries[key] = total
+        return S
+
+    def __radd__(self, other: Matrix) -> Matrix:
+        return self + other
+
+    def __matmul__(self, other: "SparseMatrix | Matrix") -> "SparseMatrix | Matrix":
+        """
+        Multiply with another matrix.
+        self:       SparseMatrix[n * k]
+        other:      SparseMatrix[k * m] or Matrix[k * m]
+        Returns     SparseMatrix[n * m], or Matrix[n * m] if other is dense
+
+        Only pairs of non-zero entries are multiplied, i.e. O(nnz(self) * average non-zeros per row of other).
+        """
+
+        if self._cols != other.height():
+            raise ValueError(f"Cannot multiply Matrix[{self._rows} * {self._cols}] by Matrix[{other.height()} * {other.width()}]")
+
+        indptr, indices, values = self.csr()
+
+        if not isinstance(other, SparseMatrix):
+            M = Matrix(self._rows, other.width())
+            for i in range(self._rows):
+                row = [0] * other.width()
+                for p in range(indptr[i], indptr[i + 1]):
+                    a = values[p]
+                    for j, b in enumerate(other[indices[p]]):
+                        row[j] += a * b
+                for j, e in enumerate(row):
+                    if e != 0:
+                        M[i, j] = e
+            return M
+
+        B_indptr, B_indices, B_values = other.csr()
+        S = SparseMatrix(self._rows, other.width())
+        for i in range(self._rows):                         # Row i of the result, accumulated sparsely
+            row: dict[int, float] = {}
+            for p in range(indptr[i], indptr[i + 1]):
+                a, k = values[p], indices[p]
+                for q in range(B_indptr[k], B_indptr[k + 1]):
+                    j = B_indices[q]
+                    row[j] = row.get(j, 0) + a * B_values[q]
+            for j, e in row.items():
+                if e != 0:
+                    S._entries[i, j] = e
+        return S
+
+    def __rmatmul__(self, other: Matrix) -> Matrix:
+        # Matrix @ SparseMatrix, computed as (self^T @ other^T)^T
+        return (self.transpose() @ other.transpose()).transpose()
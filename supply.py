@@ -3,6 +3,8 @@ To store constants, hashmaps and classes relating to supplies (weights, costs an
 Classes involving list of Supplies including supply count, and SupplyOrder structure to store net weight and cost.
 """
 
+from array import array
+
 # Two separate hashmaps which stores supply cost and weight.
 SUPPLY_WEIGHT: dict[str, float] = {
     "Scalpel": 0.1,
@@ -34,61 +36,114 @@ SUPPLY_COST: dict[str, float] = {
 }
 SUPPLY_NAMES: list[str] = {"".join(supply.lower().split()): supply for supply in SUPPLY_WEIGHT.keys()}
 
+# Supply ids: the position of each supply in the count array of Supplies.
+SUPPLY_IDS: dict[str, int] = {supply: i for i, supply in enumerate(SUPPLY_WEIGHT)}
+SUPPLY_BY_ID: list[str] = list(SUPPLY_WEIGHT)
+SUPPLY_WEIGHT_BY_ID: list[float] = [SUPPLY_WEIGHT[supply] for supply in SUPPLY_BY_ID]
+SUPPLY_COST_BY_ID: list[float] = [SUPPLY_COST[supply] for supply in SUPPLY_BY_ID]
+_CONCAT_IDS: dict[str, int] = {concat: SUPPLY_IDS[supply] for concat, supply in SUPPLY_NAMES.items()}
+_LOOKUP_IDS: dict[str, int] = {**_CONCAT_IDS, **SUPPLY_IDS}     # Both spellings, e.g. "dialysismachine" and "Dialysis Machine"
+N_SUPPLIES = len(SUPPLY_BY_ID)
+
+def supply_id(supply: str) -> int | None:
+    """
+    Returns the id of a supply from its name in any case or spacing, or None if there is no such supply.
+    """
+
+    i = _LOOKUP_IDS.get(supply)
+    if i is None:
+        i = _CONCAT_IDS.get("".join(supply.lower().split()))
+    return i
+
 class Supplies:
+    """
+    Counts of each supply, stored in one fixed-length integer array indexed by supply id:
+    _counts[i] is the count of supply i and _counts[N_SUPPLIES + i] the position it is listed in
+    (0 if it was never added), so copying is a single buffer copy.
+    net_weight and net_value are kept up to date on every add and remove.
+    """
+
+    __slots__ = ("_counts", "_listed", "net_weight", "net_value")
+
     def __init__(self, **kwargs):
+        self._counts = array("q", bytes(16 * N_SUPPLIES))
+        self._listed = 0
         self.net_weight = 0
         self.net_value = 0
-        self._supplies: dict[str, int] = {}
         for supply, count in kwargs.items():
-            if supply not in SUPPLY_NAMES:
+            i = _CONCAT_IDS.get(supply)
+            if i is None:
                 continue
-            setattr(self, supply, count)
-            supply = SUPPLY_NAMES[supply]
-            self.net_weight += SUPPLY_WEIGHT[supply] * count
-            self.net_value += SUPPLY_COST[supply] * count
-            self._supplies[supply] = count
-    
+            self._add(i, count)
+
+    def _add(self, i: int, count: int):
+        counts = self._counts
+        if counts[N_SUPPLIES + i] == 0:
+            self._listed += 1
+            counts[N_SUPPLIES + i] = self._listed
+        counts[i] += count
+        self.net_weight += SUPPLY_WEIGHT_BY_ID[i] * count
+        self.net_value += SUPPLY_COST_BY_ID[i] * count
+
+    def _listing(self) -> list[int]:
+        # Ids of the supplies added so far, in the order they were first added.
+        counts = self._counts
+        return sorted((i for i in range(N_SUPPLIES) if counts[N_SUPPLIES + i]), key = lambda i: counts[N_SUPPLIES + i])
+
     def __str__(self) -> str:
         s = ""
-        for supply in self._supplies:
-            count = self._supplies[supply]
-            s += f"{count}x {supply}, "
+        for i in self._listing():
+            s += f"{self._counts[i]}x {SUPPLY_BY_ID[i]}, "
         return s[:-2]
     def __repr__(self) -> str:
         return str(self)
-    
+
+    def __getattr__(self, name: str) -> int:
+        # Counts by concatenated name, e.g. supplies.dialysismachine
+        i = _CONCAT_IDS.get(name)
+        if i is None or not self._counts[N_SUPPLIES + i]:
+            raise AttributeError(f"'Supplies' object has no attribute '{name}'")
+        return self._counts[i]
+
+    def count(self, supply: str) -> int:
+        i = supply_id(supply)
+        return 0 if i is None else self._counts[i]
+
+    def counts(self) -> array:
+        """
+        Count of every supply, indexed by supply id. A copy, so the result can be changed freely.
+        """
+
+        return self._counts[:N_SUPPLIES]
+
     def dict(self) -> dict:
-        return self._supplies
+        return {SUPPLY_BY_ID[i]: self._counts[i] for i in self._listing()}
+
+    @property
+    def _supplies(self) -> dict:
+        return self.dict()
     
     def add(self, supply_concat: str, count: int):
-        supply_concat = "".join(supply_concat.lower().split())
-        if supply_concat not in SUPPLY_NAMES:
+        i = supply_id(supply_concat)
+        if i is None:
             return
-        supply = SUPPLY_NAMES[supply_concat]
-        self.net_weight += SUPPLY_WEIGHT[supply] * count
-        self.net_value += SUPPLY_COST[supply] * count
-        if supply in self._supplies:
-            self._supplies[supply] += count
-            setattr(self, supply_concat, self._supplies[supply])
-            return
-        self._supplies[supply] = count
-        setattr(self, supply_concat, count)
+        self._add(i, count)
 
     def remove(self, supply: str, count: int):
-        supply_concat = "".join(supply.lower().split())
-        if supply_concat not in SUPPLY_NAMES:
-            return
-        if SUPPLY_NAMES[supply_concat] not in self._supplies:
+        i = supply_id(supply)
+        if i is None or not self._counts[N_SUPPLIES + i]:
             return
-        setattr(self, supply_concat, count)
-        supply = SUPPLY_NAMES[supply_concat]
-        self._supplies[supply] -= count
-        self.net_weight -= SUPPLY_WEIGHT[supply] * count
-        self.net_value -= SUPPLY_COST[supply] * count
+        self._counts[i] -= count
+        self.net_weight -= SUPPLY_WEIGHT_BY_ID[i] * count
+        self.net_value -= SUPPLY_COST_BY_ID[i] * count
 
     def copy(self) -> "Supplies":
-        s = {value: key for key, value in SUPPLY_NAMES.items()}
-        return Supplies(**{s[name]: self._supplies[name] for name in self._supplies})
+        copy = Supplies.__new__(Supplies)
+        copy._counts = self._counts[:]          # O(N_SUPPLIES) buffer copy
+        copy._listed = self._listed
+        copy.net_weight = self.net_weight
+        copy.net_value = self.net_value
+        return copy
 
 class SupplyOrder:
     def __init__(self, **kwargs):
@@ -97,11 +152,7 @@ class SupplyOrder:
             setattr(self, key, value)
     
     def is_empty(self) -> bool:
-        d = self.supplies.dict()
-        for supply in d:
-            if d[supply] != 0:
-                return False
-        return True
+        return not any(self.supplies.counts())
 
     @property
     def net_weight(self) -> float:
@@ -115,7 +166,78 @@ class SupplyOrder:
         return self.supplies._supplies
     
     def contains(self, supply: str) -> bool:
-        return supply in self.supplies._supplies
+        i = SUPPLY_IDS.get(supply)
+        return i is not None and self.supplies._counts[N_SUPPLIES + i] != 0
 
     def copy(self) -> "SupplyOrder":
         return SupplyOrder(town=self.town, supplies=self.supplies.copy())
+
+class OrderBook:
+    """
+    The orders still to be delivered, keyed by town, with several orders allowed per town.
+    Lookup and removal by town or by order are O(1), and net_weight/net_value are kept up to date
+    as orders come and go. Iterating gives the orders in the order they were added.
+    """
+
+    def __init__(self, orders: list[SupplyOrder] = ()):
+        self._orders: dict[int, SupplyOrder] = {}                   # id(order): order
+        self._by_town: dict[str, dict[int, SupplyOrder]] = {}       # town: {id(order): order}
+        self._town_weight: dict[str, float] = {}
+        self.net_weight = 0
+        self.net_value = 0
+        for order in orders:
+            self.add(order)
+
+    def add(self, order: SupplyOrder):
+        key = id(order)
+        if key in self._orders:
+            raise ValueError(f"The order for {order.town} is already in the book")
+        self._orders[key] = order
+        self._by_town.setdefault(order.town, {})[key] = order
+        self._town_weight[order.town] = self._town_weight.get(order.town, 0) + order.net_weight
+        self.net_weight += order.net_weight
+        self.net_value += order.net_value
+
+    def remove(self, order: SupplyOrder):
+        key = id(order)
+        if key not in self._orders:
+            raise KeyError(f"The order for {order.town} is not in the book")
+        del self._orders[key]
+        town = self._by_town[order.town]
+        del town[key]
+        if town:
+            self._town_weight[order.town] -= order.net_weight
+        else:
+            del self._by_town[order.town]
+            del self._town_weight[order.town]
+        self.net_weight -= order.net_weight
+        self.net_value -= order.net_value
+        if not self._orders:        # Reset rather than keep the rounding left over from the subtractions
+            self.net_weight = 0
+            self.net_value = 0
+
+    def pop_town(self, town: str) -> list[SupplyOrder]:
+        """
+        Removes and returns every order for the town, in the order they were added.
+        """
+
+        orders = self.orders_at(town)
+        for order in orders:
+            self.remove(order)
+        return orders
+
+    def orders_at(self, town: str) -> list[SupplyOrder]:
+        return list(self._by_town.get(town, {}).values())
+
+    def weight_at(self, town: str) -> float:
+        return self._town_weight.get(town, 0)
+
+    def towns(self):
+        return self._by_town.keys()
+
+    def __contains__(self, town: str) -> bool:
+        return town in self._by_town
+    def __len__(self) -> int:
+        return len(self._orders)
+    def __iter__(self):
+        return iter(list(self._orders.values()))
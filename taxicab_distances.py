@@ -3,11 +3,30 @@
 For U3O3 SAT. Part1.
 To calculate the 'taxi-cab' or 'Manhattan' distance between towns (non-zero entries) in the map matrix.
 
+Towns are given integer ids in the order they appear in locations.txt, and distances are looked up
+by id through a distance provider:
+- DenseDistances precomputes every distance into one flat table, for O(1) indexed lookup.
+- ImplicitDistances computes each distance from the coordinates when asked, so memory stays O(n).
+
 """
 
 
-from matrix import Matrix
-from os.path import join, dirname
+from abc import ABC, abstractmethod
+from array import array
+
+from location_cache import Coordinates, read_locations, load_locations
+
+def _numpy():
+    # NumPy is imported on first use rather than at import time, as it dominates the cost of importing the planner.
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+KM_PER_CELL = 36.5              # Distance covered by one cell of the map grid
+DENSE_DISTANCE_LIMIT = 4_096    # Above this many towns, make_distance_provider(...) computes distances on demand
+DENSE_BLOCK_ROWS = 256          # Rows of the dense table computed per vectorised pass
 
 def get_edge(edges, s):
     if s in edges:
@@ -16,68 +35,185 @@ def get_edge(edges, s):
         return edges[s[::-1]]
 
 
-def generate_nodes(filename: str = "locations.txt") -> list[str]:
-    
-    with open(join(dirname(__file__), filename), "r") as f:
-        locations_string = f.read()
-
-    names: list[str] = []
+class DistanceProvider(ABC):
+    """
+    Taxicab distances between towns, addressed by town id.
+    Subclasses implement distance(u, v) and row(u), or cannot be instantiated.
+    """
+
+    def __init__(self, names: list[str], coordinates: list[tuple[int, int]]):
+        self.names = names
+        self.ids: dict[str, int] = {name: i for i, name in enumerate(names)}
+        if hasattr(coordinates, "xs"):      # location_cache.Coordinates, used without copying
+            self.xs, self.ys = coordinates.xs, coordinates.ys
+        else:
+            self.xs = array("i", [x for x, _ in coordinates])
+            self.ys = array("i", [y for _, y in coordinates])
+        self._nearest: dict[int, array] = {}   # Neighbour index, filled in by nearest(u)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def id(self, name: str) -> int:
+        return self.ids[name]
+
+    @abstractmethod
+    def distance(self, u: int, v: int) -> float:
+        ...
+
+    @abstractmethod
+    def row(self, u: int) -> list[float]:
+        """
+        Returns the distances from town u to every town, indexed by town id.
+        """
+
+    def distance_between(self, start: str, dest: str) -> float:
+        return self.distance(self.ids[start], self.ids[dest])
+
+    def nearest(self, u: int) -> array:
+        """
+        Returns the ids of every other town, sorted by distance from town u (ties in file order).
+        Each town's adjacency array is sorted once and kept, so later calls are O(1).
+        """
+
+        if u in self._nearest:
+            return self._nearest[u]
+
+        row = self.row(u)
+        np = _numpy()
+        if np is not None:
+            order = np.argsort(np.array(row), kind="stable").tolist()  # Stable, so ties stay in file order
+        else:
+            order = sorted(range(len(row)), key=row.__getitem__)        # O(n log n)
+        order.remove(u)
+
+        self._nearest[u] = array("i", order)
+        return self._nearest[u]
+
+class DenseDistances(DistanceProvider):
+    """
+    Every distance precomputed into a flat row-major n * n table: O(n^2) memory, O(1) lookup.
+    """
+
+    def __init__(self, names: list[str], coordinates: list[tuple[int, int]]):
+        super().__init__(names, coordinates)
+        n = len(names)
+        np = _numpy()
+
+        if np is not None:
+            # Vectorised |x1 - x2| + |y1 - y2|, written straight into the table through an ndarray view of it,
+            # DENSE_BLOCK_ROWS rows at a time so the only temporary is one block.
+            self._table = array("d", [0.0]) * (n * n)
+            table = np.frombuffer(self._table, dtype=np.float64).reshape(n, n)
+            xs, ys = np.array(self.xs, dtype=np.float64), np.array(self.ys, dtype=np.float64)
+            for r0 in range(0, n, DENSE_BLOCK_ROWS):
+                r1 = min(r0 + DENSE_BLOCK_ROWS, n)
+                block = table[r0:r1]
+                np.subtract(xs[r0:r1, None], xs[None, :], out=block)
+                np.abs(block, out=block)
+                dy = np.subtract(ys[r0:r1, None], ys[None, :])
+                block += np.abs(dy, out=dy)
+                block *= KM_PER_CELL
+        else:
+            self._table = array("d")
+            for u in range(n):                                  # O(n)
+                x1, y1 = self.xs[u], self.ys[u]
+                self._table.extend([(abs(x1 - x2) + abs(y1 - y2)) * KM_PER_CELL for x2, y2 in zip(self.xs, self.ys)])
+
+    def distance(self, u: int, v: int) -> float:
+        return self._table[u * len(self.names) + v]
+
+    def row(self, u: int) -> list[float]:
+        n = len(self.names)
+        return self._table[u * n : (u + 1) * n].tolist()
+
+class ImplicitDistances(DistanceProvider):
+    """
+    Distances computed from the coordinates on every lookup: O(n) memory, O(1) lookup.
+    """
+
+    def distance(self, u: int, v: int) -> float:
+        return (abs(self.xs[u] - self.xs[v]) + abs(self.ys[u] - self.ys[v])) * KM_PER_CELL
+
+    def row(self, u: int) -> list[float]:
+        x1, y1 = self.xs[u], self.ys[u]
+        return [(abs(x1 - x2) + abs(y1 - y2)) * KM_PER_CELL for x2, y2 in zip(self.xs, self.ys)]
+
+def make_distance_provider(names: list[str], coordinates: list[tuple[int, int]], dense: bool = None) -> DistanceProvider:
+    """
+    dense: True for DenseDistances, False for ImplicitDistances, or None to choose by the number of towns.
+    """
+
+    if dense is None:
+        dense = len(names) <= DENSE_DISTANCE_LIMIT
+    return DenseDistances(names, coordinates) if dense else ImplicitDistances(names, coordinates)
+
+class Network:
+    """
+    The towns of one location file: names, coordinates, postcodes and the distances between them.
+    The distance provider and the edges dictionary are only built when first used.
+    """
+
+    def __init__(self, names: list[str], coordinates: "list[tuple[int, int]] | Coordinates", postcodes: list[str]):
+        self.names = names
+        self.coordinates = coordinates
+        self.postcodes = postcodes
+        self._distances: DistanceProvider = None
+        self._edges: dict[tuple, float] = None
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def distances(self) -> DistanceProvider:
+        if self._distances is None:
+            self._distances = make_distance_provider(self.names, self.coordinates)
+        return self._distances
+
+    @property
+    def edges(self) -> dict[tuple, float]:
+        """
+        {(start, dest): distance} for every pair of towns, e.g. for labelling the edges of a graph.
+        Lookups while planning should go through distances instead.
+        """
+
+        if self._edges is None:
+            names, distances = self.names, self.distances
+            self._edges = {}
+            for j in range(len(names)):
+                for i in range(j + 1, len(names)):
+                    self._edges[(names[j], names[i])] = distances.distance(j, i)
+        return self._edges
+
+_networks: dict[str, Network] = {}      # Shared by every module importing this one, keyed by filename
+
+def get_network(filename: str = "locations.txt") -> Network:
+    """
+    Returns the Network of the given location file, loading the file on the first call only
+    (through its compiled sidecar, see location_cache).
+    """
+
+    if filename not in _networks:
+        _networks[filename] = Network(*load_locations(filename))
+    return _networks[filename]
 
-    for location in locations_string.split("\n"):
-        s = location.split()
-        if len(s) < 2: continue
-
-        name = " ".join(s[2:-1])
-        names.append(name)
+def generate_nodes(filename: str = "locations.txt") -> list[str]:
 
-    return names
+    return list(get_network(filename).names)
 
 def generate_edges(filename: str = "locations.txt") -> dict[tuple, int]:
-    grid = Matrix(55, 40)
-    grid.zero_cell_placeholder = ""
-
-    with open(join(dirname(__file__), filename), "r") as f:
-        locations_string = f.read()
-
-    locations: dict[str, tuple] = {}
-    names: list[str] = []
-
-    for location in locations_string.split("\n"):
-
-        s = location.split()
-        if len(s) < 2: continue
-
-        pair = [int(s[0][:-1]), int(s[1])]
-        name = " ".join(s[2:-1])
-        postcode = s[-1]
-        
-        grid[*pair] = name
-        locations[name] = pair
-        names.append(name)
-
-    edges: dict[tuple: int] = {}
-
-    for j in range(len(names)):
-        for i in range(j + 1, len(names)):
-            start = names[j]
-            dest = names[i]
-            x1, y1 = locations[start]
-            x2, y2 = locations[dest]
-            taxicab_distance = abs(x1 - x2) + abs(y1 - y2)
-
-            edges[(start, dest)] = taxicab_distance * 36.5
 
-    return edges
+    return dict(get_network(filename).edges)
 
 if __name__ == "__main__":
 
     print("Nodes:")
     print(generate_nodes())
 
-    e = generate_edges()
+    distances = get_network().distances
 
     s = ["Exmouth", "Monkey Mia", "Broome", "Derby", "Esperance"]
     for x in s:
         u, v = ("Perth", x)
         print(f"Edge: {u, v}")
-        print(get_edge(e, (u, v)))
\ No newline at end of file
+        print(distances.distance_between(u, v))
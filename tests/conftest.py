@@ -0,0 +1,5 @@
+import sys
+from os.path import dirname, abspath
+
+# The modules live at the repository root rather than in a package.
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
@@ -0,0 +1,84 @@
+"""
+The closed-form plane sequence against the original plane-by-plane loop, and the fleet mix against a
+search over every small and large plane count, with and without NumPy.
+"""
+
+import random
+from math import ceil
+
+import pytest
+
+import plane_sequencer
+from plane_sequencer import determine_planes, plane_counts, plane_runs, optimal_fleet_mix
+from constants import SMALLER_PLANE, LARGER_PLANE, C1, C2, EMPTY_WEIGHT_1, EMPTY_WEIGHT_2
+
+@pytest.fixture(params = ["numpy", "list"])
+def engine(request, monkeypatch):
+    if request.param == "numpy":
+        if plane_sequencer.np is None:
+            pytest.skip("NumPy is not installed")
+    else:
+        monkeypatch.setattr(plane_sequencer, "np", None)
+    return request.param
+
+def loop_planes(net_weight: float) -> list[str]:
+    # The original determine_planes(...), one plane at a time.
+    remaining_weight = net_weight
+    plane_sequence = []
+    previous_plane = None
+    while remaining_weight > 0:
+        if (remaining_weight <= C1 or remaining_weight > C2) and previous_plane != SMALLER_PLANE:
+            plane_sequence.append(SMALLER_PLANE)
+            remaining_weight -= C1
+            previous_plane = SMALLER_PLANE
+        else:
+            plane_sequence.append(LARGER_PLANE)
+            remaining_weight -= C2
+            previous_plane = LARGER_PLANE
+    return plane_sequence
+
+def random_weights(seed: int, n: int) -> list[float]:
+    rng = random.Random(seed)
+    boundaries = [0, -5, C1, C2, C1 + C2, 2 * C1 + C2, 2 * (C1 + C2), C1 + 1e-9, C2 - 1e-9]
+    return [rng.choice([rng.uniform(0, 30_000), round(rng.uniform(0, 30_000)), rng.choice(boundaries)]) for _ in range(n)]
+
+def test_determine_planes_matches_loop():
+    for W in random_weights(1, 3_000):
+        assert determine_planes(W) == loop_planes(W), W
+
+def test_plane_runs_expand_to_sequence():
+    for W in random_weights(2, 500):
+        assert [plane for pattern, count in plane_runs(W) for plane in pattern * count] == loop_planes(W), W
+
+def test_plane_counts_match_loop(engine):
+    weights = random_weights(3, 3_000)
+    small, large = plane_counts(weights)
+    for W, s, l in zip(weights, small, large):
+        sequence = loop_planes(W)
+        assert (int(s), int(l)) == (sequence.count(SMALLER_PLANE), sequence.count(LARGER_PLANE)), W
+    assert plane_counts(5600.0) == (2, 2)
+
+def best_mix(W: float, objective: str) -> tuple:
+    # (primary, secondary) of the best of every (small, large) count carrying W.
+    best = None
+    for s in range(ceil(max(W, 0) / C1) + 1):
+        l = ceil(max(0, W - s * C1) / C2)
+        fuel, sorties = s * EMPTY_WEIGHT_1 + l * EMPTY_WEIGHT_2, s + l
+        key = (fuel, sorties) if objective == "fuel" else (sorties, fuel)
+        if best is None or key < best:
+            best = key
+    return best
+
+@pytest.mark.parametrize("objective", ["fuel", "sorties"])
+def test_optimal_fleet_mix_matches_search(engine, objective):
+    weights = random_weights(4, 1_000)
+    small, large = optimal_fleet_mix(weights, objective)
+    for W, s, l in zip(weights, small, large):
+        s, l = int(s), int(l)
+        assert s * C1 + l * C2 >= W, W
+        fuel, sorties = s * EMPTY_WEIGHT_1 + l * EMPTY_WEIGHT_2, s + l
+        assert ((fuel, sorties) if objective == "fuel" else (sorties, fuel)) == best_mix(W, objective), W
+
+def test_optimal_fleet_mix_rejects_unknown_objective():
+    with pytest.raises(ValueError):
+        optimal_fleet_mix(1000.0, "speed")
@@ -0,0 +1,75 @@
+"""
+The bounded knapsack against a brute-force search over every count of every supply, with and without
+NumPy, for one capacity and for several capacities answered from one table.
+"""
+
+import random
+from itertools import product
+
+import pytest
+
+import select_maximum_supplies
+from select_maximum_supplies import GRAMS_PER_KG, CENTS_PER_DOLLAR, select_maximum_of_supplies, select_maximum_of_supplies_for_capacities
+from supply import SupplyOrder, Supplies, SUPPLY_NAMES, SUPPLY_WEIGHT, SUPPLY_COST
+
+CAPACITIES = [0.0, 0.05, 0.3, 1.0, 2.5, 7.3, 150.0, 300.5]
+
+@pytest.fixture(params = ["numpy", "array"])
+def engine(request, monkeypatch):
+    if request.param == "numpy":
+        if select_maximum_supplies.np is None:
+            pytest.skip("NumPy is not installed")
+    else:
+        monkeypatch.setattr(select_maximum_supplies, "np", None)
+    return request.param
+
+def grams(supply: str) -> int:
+    return round(SUPPLY_WEIGHT[supply] * GRAMS_PER_KG)
+
+def cents(supply: str) -> int:
+    return round(SUPPLY_COST[supply] * CENTS_PER_DOLLAR)
+
+def brute_force(W: float, order: SupplyOrder) -> int:
+    # Best value in cents of any selection weighing at most W.
+    counts = order.dict()
+    names = list(counts)
+    capacity = round(W * GRAMS_PER_KG)
+    best = 0
+    for combo in product(*[range(counts[name] + 1) for name in names]):
+        if sum(grams(name) * k for name, k in zip(names, combo)) <= capacity:
+            best = max(best, sum(cents(name) * k for name, k in zip(names, combo)))
+    return best
+
+def random_orders(seed: int, n: int):
+    rng = random.Random(seed)
+    supplies = list(SUPPLY_NAMES)
+    for _ in range(n):
+        counts = {supply: rng.randint(0, 6) for supply in rng.sample(supplies, rng.randint(1, 3))}
+        yield SupplyOrder(town = "Perth", supplies = Supplies(**counts)), rng
+
+def check_split(W: float, order: SupplyOrder, new: SupplyOrder, remaining: SupplyOrder):
+    selected = new.dict()
+    assert sum(grams(name) * k for name, k in selected.items()) <= round(W * GRAMS_PER_KG)
+    assert sum(cents(name) * k for name, k in selected.items()) == brute_force(W, order)
+    for name, count in order.dict().items():
+        assert selected.get(name, 0) + remaining.dict().get(name, 0) == count
+
+def test_single_capacity_matches_brute_force(engine):
+    for order, rng in random_orders(1, 150):
+        W = rng.choice(CAPACITIES)
+        new, remaining = select_maximum_of_supplies(W, order, use_cache = False)
+        check_split(W, order, new, remaining)
+
+def test_several_capacities_match_brute_force(engine):
+    # Smaller capacities are read from a table built up to the largest one, through the clipped bitmaps.
+    for order, rng in random_orders(2, 150):
+        Ws = rng.sample(CAPACITIES, 3)
+        for W, (new, remaining) in zip(Ws, select_maximum_of_supplies_for_capacities(Ws, order, use_cache = False)):
+            check_split(W, order, new, remaining)
+
+def test_large_counts(engine):
+    # Binary split pieces reaching far past the capacity, at gram resolution.
+    order = SupplyOrder(town = "Perth", supplies = Supplies(sticker = 5000, masks = 3000, scalpel = 40, dialysismachine = 2))
+    new, _ = select_maximum_of_supplies(20.0, order, use_cache = False)
+    # Best value per kg: scalpels (4 kg), then stickers (5 kg), then masks fill the last 11 kg exactly.
+    assert new.dict() == {"Scalpel": 40, "Sticker": 5000, "Masks": 1100}